@@ -1,19 +1,37 @@
 #!/usr/bin/python3
-from ntru_py.ntc.ntc import NTRU_PARAM_TYPES, NTRU_PARAMS, unpack_ntru_tuple
-from ntru_py.poly.core import ntru_keygen, ntru_random_message, ntru_encrypt, ntru_decrypt
+from ntru_py.ntc.ntc import NTRU_PARAM_TYPES, NTRU_PARAMS, KEY_FORM_TERNARY, KEY_FORM_FAST_FP, unpack_ntru_tuple
+from ntru_py.poly.core import POLY_1, ntru_keygen, ntru_random_message, ntru_encrypt, ntru_decrypt, ntru_decrypt_batch, ntru_private_fp, ntru_fast_fp_supported
+from ntru_py.poly.kem import ntru_kem_encrypt_stream, ntru_kem_decrypt_stream
 from ntru_py.ntc.ntc_json import *
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import glob
+import os
 import sys
+import time
 
-VALID_CMDS = ['keygen', 'message', 'encrypt', 'decrypt'] 
+VALID_CMDS = ['keygen', 'message', 'encrypt', 'decrypt', 'kem-encrypt', 'kem-decrypt'] 
 # Commands list:
 # encrypt m pk -> c.json
 # decrypt c sk -> c_dec.json 
 # message -> m.json
-# keygen -> pk.json sk.json
+# keygen [--fast-fp] -> pk.json sk.json
+# kem-encrypt in pk out -> out (any file encrypted in hybrid KEM/DEM mode)
+# kem-decrypt in sk out -> out
+#
+# Batch mode (encrypt, decrypt, message):
+# encrypt <inputs>... pk --out-dir DIR [--jobs J] -> DIR/<input name>
+# decrypt <inputs>... sk --out-dir DIR [--jobs J] -> DIR/<input name>
+# message --count K --out-dir DIR [--jobs J] -> DIR/m_<i>.json
+# where every input is a file, a glob pattern, a directory (all *.json files inside)
+# or @manifest (text file with one input path per line)
 
-def cmd_keygen(ntru_tuple: NtruTuple) -> tuple[PolyCoeffs, PolyCoeffs]:
+# Number of files processed by a single worker task
+BATCH_CHUNK_FILES = 64
+
+def cmd_keygen(ntru_tuple: NtruTuple, key_form: str = KEY_FORM_TERNARY) -> tuple[PolyCoeffs, PolyCoeffs]:
     N, p, q, d = ntru_tuple
-    h, f = ntru_keygen(N, p, q, d)
+    h, f = ntru_keygen(N, p, q, d, fast_fp=(key_form == KEY_FORM_FAST_FP))
     return h, f
 
 def cmd_encrypt(ntru_tuple: NtruTuple, m: PolyCoeffs, h: PolyCoeffs) -> PolyCoeffs:
@@ -21,9 +39,11 @@ def cmd_encrypt(ntru_tuple: NtruTuple, m: PolyCoeffs, h: PolyCoeffs) -> PolyCoef
     c = ntru_encrypt(N, q, d, m, h)
     return c
 
-def cmd_decrypt(ntru_tuple: NtruTuple, c: PolyCoeffs, f: PolyCoeffs) -> PolyCoeffs:
+def cmd_decrypt(ntru_tuple: NtruTuple, c: PolyCoeffs, f: PolyCoeffs, key_form: str = KEY_FORM_TERNARY) -> PolyCoeffs:
     N, p, q, d = ntru_tuple
-    m = ntru_decrypt(N, p, q, c, f)
+    # Key in form f = 1 + pF does not require the inverse modulo p
+    fp = POLY_1 if key_form == KEY_FORM_FAST_FP else None
+    m = ntru_decrypt(N, p, q, c, f, fp)
     return m
 
 def cmd_message(ntru_tuple: NtruTuple) -> PolyCoeffs:
@@ -32,6 +52,113 @@ def cmd_message(ntru_tuple: NtruTuple) -> PolyCoeffs:
     m = ntru_random_message(N, p)
     return m
 
+def expand_inputs(args: list[str]) -> list[str]:
+    """Expand files, glob patterns, directories and @manifest files into a list of input files"""
+    inputs = []
+    for arg in args:
+        if arg.startswith('@'):
+            with open(arg[1:]) as manifest:
+                lines = [ line.strip() for line in manifest ]
+            # Entries of the manifest can be files, patterns or directories as well
+            inputs.extend(expand_inputs([ line for line in lines if line and not line.startswith('#') ]))
+        elif os.path.isdir(arg):
+            inputs.extend(sorted(glob.glob(os.path.join(arg, '*.json'))))
+        elif glob.has_magic(arg):
+            inputs.extend(sorted(glob.glob(arg)))
+        else:
+            inputs.append(arg)
+    return inputs
+
+def pop_option(args: list[str], name: str, default: str | None = None) -> str | None:
+    """Remove option `name` with its value from `args` and return the value"""
+    if name not in args:
+        return default
+    i = args.index(name)
+    if i + 1 == len(args):
+        print(f"Missing value of the {name} option")
+        exit(1)
+    value = args[i + 1]
+    del args[i : i + 2]
+    return value
+
+# Key is loaded once in every worker process by the pool initializer
+_worker_key = None
+
+def _init_worker(key):
+    global _worker_key
+    _worker_key = key
+
+def _encrypt_files(ntru_tuple: NtruTuple, files: list[tuple[str, str]]) -> int:
+    N, p, q, d = ntru_tuple
+    h = _worker_key
+    for in_fname, out_fname in files:
+        m = load_message(ntru_tuple, in_fname)
+        # Blinding polynomial is sampled from the OS CSPRNG instead of the Mersenne Twister of `random`,
+        # explicit source of random bytes also selects the bulk sampler
+        c = ntru_encrypt(N, q, d, m, h, os.urandom)
+        store_ciphertext(c, ntru_tuple, out_fname)
+    return len(files)
+
+def _decrypt_files(ntru_tuple: NtruTuple, files: list[tuple[str, str]]) -> int:
+    N, p, q, d = ntru_tuple
+    f, fp = _worker_key
+    ciphertexts = [ load_ciphertext(ntru_tuple, in_fname) for in_fname, _ in files ]
+    # Whole chunk is decrypted at once with the shared private key
+    for m, (_, out_fname) in zip(ntru_decrypt_batch(N, p, q, ciphertexts, f, fp), files):
+        store_message(m, ntru_tuple, out_fname)
+    return len(files)
+
+def _message_files(ntru_tuple: NtruTuple, files: list[tuple[str, str]]) -> int:
+    N, p, q, d = ntru_tuple
+    for _, out_fname in files:
+        store_message(ntru_random_message(N, p, os.urandom), ntru_tuple, out_fname)
+    return len(files)
+
+def run_batch(fn, ntru_tuple: NtruTuple, key, files: list[tuple[str, str]], jobs: int) -> int:
+    """Process `(input, output)` file pairs with `fn` across `jobs` worker processes"""
+    chunks = [ files[i : i + BATCH_CHUNK_FILES] for i in range(0, len(files), BATCH_CHUNK_FILES) ]
+
+    if jobs == 1:
+        _init_worker(key)
+        return sum(fn(ntru_tuple, chunk) for chunk in chunks)
+
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(key,)) as pool:
+        futures = [ pool.submit(fn, ntru_tuple, chunk) for chunk in chunks ]
+        return sum(future.result() for future in futures)
+
+def batch_main(cmd: str, ntru_tuple: NtruTuple, args: list[str], out_dir: str, jobs: int):
+    if cmd == 'message':
+        count = int(pop_option(args, '--count', '1'))
+        files = [ (None, os.path.join(out_dir, f"m_{i}.json")) for i in range(count) ]
+        fn, key = _message_files, None
+    else:
+        if len(args) < 2:
+            print(f"usage: ./prog.py <ntru-type> {cmd} <inputs>... <key.json> --out-dir <dir> [--jobs J]")
+            exit(1)
+
+        inputs = expand_inputs(args[:-1])
+        files = [ (fname, os.path.join(out_dir, Path(fname).name)) for fname in inputs ]
+        if len(set(out for _, out in files)) != len(files):
+            print("Inputs contain files with the same name, outputs would overwrite each other")
+            exit(1)
+
+        if cmd == 'encrypt':
+            fn, key = _encrypt_files, load_pk(ntru_tuple, args[-1])
+        else:
+            N, p, q, d = ntru_tuple
+            f = load_sk(ntru_tuple, args[-1])
+            # fp is derived once here instead of in every worker
+            fp = ntru_private_fp(f, N, p)
+            fn, key = _decrypt_files, (f, fp)
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    n_files = run_batch(fn, ntru_tuple, key, files, jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f"{cmd}: {n_files} files in {elapsed:.2f} s ({n_files / max(elapsed, 1e-9):.1f} files/s, {jobs} jobs)")
+
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("usage: ./cli-ntru.py ntru-type cmd [params]")
@@ -53,19 +180,32 @@ if __name__ == "__main__":
     ntru_dict = NTRU_PARAMS[ntru_type]
     ntru_tuple = unpack_ntru_tuple(ntru_dict)
 
+    # Many inputs processed by a pool of workers, outputs keep names of the inputs
+    if cmd in ['encrypt', 'decrypt', 'message'] and '--out-dir' in sys.argv:
+        args = sys.argv[3:]
+        out_dir = pop_option(args, '--out-dir')
+        jobs = int(pop_option(args, '--jobs', str(os.cpu_count() or 1)))
+        batch_main(cmd, ntru_tuple, args, out_dir, jobs)
+        exit(0)
 
     if cmd == 'keygen':
         if len(sys.argv) < 3:
-            print("usage: ./prog.py <ntru-type> keygen [pk.json] [sk.json]")
+            print("usage: ./prog.py <ntru-type> keygen [pk.json] [sk.json] [--fast-fp]")
+            exit(1)
+
+        args = [ arg for arg in sys.argv if arg != '--fast-fp' ]
+        key_form = KEY_FORM_FAST_FP if '--fast-fp' in sys.argv else KEY_FORM_TERNARY
+        if key_form == KEY_FORM_FAST_FP and not ntru_fast_fp_supported(ntru_dict['p'], ntru_dict['q'], ntru_dict['d']):
+            print(f"Keys in form f = 1 + pF can fail to decrypt with '{ntru_type}' params, q is too small.")
             exit(1)
-        
-        h, f = cmd_keygen(ntru_tuple)
 
-        pk_fname = sys.argv[3] if len(sys.argv) >= 4 else f"pk_{ntru_type}.json"
-        sk_fname = sys.argv[4] if len(sys.argv) >= 5 else f"sk_{ntru_type}.json"
+        h, f = cmd_keygen(ntru_tuple, key_form)
+
+        pk_fname = args[3] if len(args) >= 4 else f"pk_{ntru_type}.json"
+        sk_fname = args[4] if len(args) >= 5 else f"sk_{ntru_type}.json"
 
         store_pk(h, ntru_tuple, pk_fname)
-        store_sk(f, ntru_tuple, sk_fname)
+        store_sk(f, ntru_tuple, sk_fname, key_form)
 
     if cmd == 'message':
         if len(sys.argv) != 3:
@@ -95,9 +235,36 @@ if __name__ == "__main__":
 
         c: PolyCoeffs = load_ciphertext(ntru_tuple, sys.argv[3])
         f: PolyCoeffs = load_sk(ntru_tuple, sys.argv[4])
+        key_form = load_sk_key_form(ntru_tuple, sys.argv[4])
 
         # ... 
-        m = cmd_decrypt(ntru_tuple, c, f)
+        m = cmd_decrypt(ntru_tuple, c, f, key_form)
 
         store_message(m, ntru_tuple, "c_dec.json")
 
+    if cmd == 'kem-encrypt':
+        if len(sys.argv) != 6:
+            print("usage: ./prog.py <ntru-type> kem-encrypt <input> <pk.json> <output>")
+            exit(1)
+
+        h = load_pk(ntru_tuple, sys.argv[4])
+        with open(sys.argv[3], 'rb') as src, open(sys.argv[5], 'wb') as dst:
+            ntru_kem_encrypt_stream(ntru_tuple, h, src, dst)
+
+    if cmd == 'kem-decrypt':
+        if len(sys.argv) != 6:
+            print("usage: ./prog.py <ntru-type> kem-decrypt <input> <sk.json> <output>")
+            exit(1)
+
+        f = load_sk(ntru_tuple, sys.argv[4])
+        key_form = load_sk_key_form(ntru_tuple, sys.argv[4])
+        fp = POLY_1 if key_form == KEY_FORM_FAST_FP else None
+
+        try:
+            with open(sys.argv[3], 'rb') as src, open(sys.argv[5], 'wb') as dst:
+                ntru_kem_decrypt_stream(ntru_tuple, f, src, dst, fp)
+        except ValueError as e:
+            # Output must not be mistaken for the authentic plaintext
+            os.remove(sys.argv[5])
+            print(f"Decryption failed: {e}")
+            exit(1)
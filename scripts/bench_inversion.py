@@ -0,0 +1,69 @@
+from ntru_py.ntc.ntc import NTRU_PARAMS, NTRU_PARAM_TYPES, unpack_ntru_tuple
+from ntru_py.poly.core import *
+from ntru_py.poly.gf3 import gf3_from_poly, gf3_to_poly, gf3_inv
+from ntru_py.poly.sampler import shake_drbg
+import sys
+import time
+
+# Benchmark of the inversion engines in Zp[X]/(X^N - 1)
+#
+# usage: python3 ./scripts/bench_inversion.py [ntru-type ...]
+#
+# Every engine inverts the same private keys modulo 2 (first step of fq) and modulo p,
+# time is the mean over N_KEYS keys. `*` marks the engine used by `poly_inv_modprime`.
+N_KEYS = 5
+
+def _engines(N: int, p: int) -> dict:
+    M = [ 0 ] * (N + 1)
+    M[N], M[0] = (1, -1)
+    engines = {
+        "xgcd": lambda f: poly_xgcd(f, M, p)[1],
+        "bezout": lambda f: poly_xgcd_bezout(f, M, p)[1],
+        "frobenius": lambda f: poly_inv_frobenius(f, N, p),
+    }
+    if p == 3:
+        engines["gf3"] = lambda f: gf3_to_poly(gf3_inv(gf3_from_poly(f), gf3_from_poly(M)))
+    return engines
+
+def _used_engine(N: int, p: int) -> str:
+    if p == 3:
+        return "gf3"
+    if N >= POLY_FROBENIUS_INV_MIN_DEGREE:
+        return "frobenius"
+    return "bezout" if N >= POLY_HGCD_INV_MIN_DEGREE else "xgcd"
+
+if __name__ == '__main__':
+
+    param_types = sys.argv[1:] or NTRU_PARAM_TYPES
+    for param_type in param_types:
+        if param_type not in NTRU_PARAM_TYPES:
+            print(f"Incorrect ntru-type value '{param_type}'. Possible values are: {NTRU_PARAM_TYPES}")
+            exit(1)
+
+    names = ["xgcd", "bezout", "frobenius", "gf3"]
+    print(f"{'params':>8} {'mod':>4} {'k':>4} " + " ".join(f"{name:>12}" for name in names))
+
+    for param_type in param_types:
+        N, p, q, d = unpack_ntru_tuple(NTRU_PARAMS[param_type])
+        randbytes = shake_drbg(b"bench_inversion/" + param_type.encode())
+        keys = [ ntru_keygen(N, p, q, d, randbytes=randbytes)[1] for _ in range(N_KEYS) ]
+
+        for m in sorted({ 2, p }):
+            engines = _engines(N, m)
+            expected = [ engines["xgcd"](f) for f in keys ]
+
+            cells = []
+            for name in names:
+                if name not in engines:
+                    cells.append(f"{'-':>12}")
+                    continue
+                start = time.perf_counter()
+                results = [ engines[name](f) for f in keys ]
+                elapsed = (time.perf_counter() - start) / N_KEYS
+                if results != expected:
+                    print(f"[-] Engine {name} returned different inverse for {param_type} modulo {m}")
+                    exit(1)
+                mark = "*" if name == _used_engine(N, m) else " "
+                cells.append(f"{elapsed * 1e3:9.3f}{mark}ms")
+
+            print(f"{param_type:>8} {m:>4} {ntru_factor_degree(N, m):>4} " + " ".join(cells))
@@ -0,0 +1,161 @@
+from ntru_py.ntc.ntc import NTRU_PARAMS, NTRU_PARAM_TYPES, unpack_ntru_tuple
+from ntru_py.poly.core import *
+from ntru_py.poly.kem import ntru_kem_encrypt_bytes, ntru_kem_decrypt_bytes
+from ntru_py.poly.sampler import shake_drbg
+from pathlib import Path
+import gc
+import json
+import sys
+import tracemalloc
+
+# Memory benchmark of public operations
+#
+# For every operation and params set reports:
+# * peak   - peak of traced memory during the operation, in bytes
+# * allocs - number of memory blocks allocated during the operation, including short-lived
+#            ones (e.g. intermediate lists), sampled by a profile hook on every call and return,
+#            so blocks allocated and freed between two such events are not counted
+# and top allocation sites of the memory live at the peak, excluding the inputs.
+# Peak is measured in a separate run without the hook, so it is not affected by it.
+#
+# usage: python3 ./scripts/bench_memory.py [--update] [--tolerance 0.1] [ntru-type ...]
+#
+# Peaks are compared with the baselines stored in BASELINE_PATH, regression above
+# the tolerance fails the check. With --update the baselines are rewritten instead.
+BASELINE_PATH = Path(__file__).parent / "memory_baselines.json"
+DEFAULT_TOLERANCE = 0.1
+TOP_SITES = 3
+# Snapshot of the memory during the operation is taken whenever it grows by this factor
+PEAK_SNAPSHOT_STEP = 1.1
+
+def _operations(ntru_tuple):
+    N, p, q, d = ntru_tuple
+    randbytes = shake_drbg(b"bench_memory")
+    M = [ 0 ] * (N + 1)
+    M[N], M[0] = (1, -1)
+
+    # Inputs are prepared outside of the measured calls
+    h, f = ntru_keygen(N, p, q, d, randbytes=randbytes)
+    fp = poly_inv_modprime(f, M, p)
+    m = ntru_random_message(N, p, randbytes)
+    c = ntru_encrypt(N, q, d, m, h, randbytes)
+    ciphertexts = [ ntru_encrypt(N, q, d, ntru_random_message(N, p, randbytes), h, randbytes) for _ in range(32) ]
+    data = randbytes(1 << 20)
+    kem_data = ntru_kem_encrypt_bytes(ntru_tuple, h, data, randbytes=randbytes)
+
+    operations = {
+        "keygen": lambda: ntru_keygen(N, p, q, d, randbytes=randbytes),
+        # Keys in form f = 1 + pF are rejected for params where they can fail to decrypt
+        "keygen_fast_fp": lambda: ntru_keygen(N, p, q, d, randbytes=randbytes, fast_fp=True),
+        "encrypt": lambda: ntru_encrypt(N, q, d, m, h, randbytes),
+        "decrypt": lambda: ntru_decrypt(N, p, q, c, f, fp),
+        "decrypt_batch_32": lambda: ntru_decrypt_batch(N, p, q, ciphertexts, f, fp),
+        "poly_xgcd": lambda: poly_xgcd(f, M, 2),
+        "poly_div_mod": lambda: poly_div_mod(poly_mul_mod(h, c, q), M, q),
+        "poly_inv_modprime_2": lambda: poly_inv_modprime(f, M, 2),
+        "poly_inv_modprime_p": lambda: poly_inv_modprime(f, M, p),
+        "poly_inv_modexp": lambda: poly_inv_modexp(f, M, 2, q.bit_length() - 1),
+        "kem_encrypt_1mb": lambda: ntru_kem_encrypt_bytes(ntru_tuple, h, data, randbytes=randbytes),
+        "kem_decrypt_1mb": lambda: ntru_kem_decrypt_bytes(ntru_tuple, f, kem_data, fp),
+    }
+    if not ntru_fast_fp_supported(p, q, d):
+        del operations["keygen_fast_fp"]
+    return operations
+
+def _profile_allocations(fn) -> tuple[int, tracemalloc.Snapshot, tracemalloc.Snapshot]:
+    """Run `fn` with a profile hook, return `(allocs, snapshot before, snapshot near the peak)`"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    state = { "last": sys.getallocatedblocks(), "allocs": 0, "peak": 0, "overhead": 0, "snapshot": before }
+
+    def hook(frame, event, arg):
+        blocks = sys.getallocatedblocks()
+        if blocks > state["last"]:
+            state["allocs"] += blocks - state["last"]
+
+        # Memory of the snapshot itself is traced too, so it is subtracted
+        current = tracemalloc.get_traced_memory()[0] - state["overhead"]
+        if current > state["peak"] * PEAK_SNAPSHOT_STEP:
+            state["snapshot"] = None
+            start = tracemalloc.get_traced_memory()[0]
+            state["snapshot"] = tracemalloc.take_snapshot()
+            state["overhead"] = tracemalloc.get_traced_memory()[0] - start
+            state["peak"] = current
+
+        # Blocks allocated by the hook are not counted
+        state["last"] = sys.getallocatedblocks()
+
+    sys.setprofile(hook)
+    try:
+        result = fn()
+    finally:
+        sys.setprofile(None)
+    at_peak = state["snapshot"]
+    tracemalloc.stop()
+    del result
+    return state["allocs"], before, at_peak
+
+def measure(fn) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    allocs, before, at_peak = _profile_allocations(fn)
+
+    # Only memory allocated by the package, excluding the inputs existing before the operation
+    package = [ tracemalloc.Filter(True, "*ntru_py*") ]
+    stats = at_peak.filter_traces(package).compare_to(before.filter_traces(package), "lineno")
+    stats = sorted((s for s in stats if s.size_diff > 0), key=lambda s: s.size_diff, reverse=True)
+    sites = [ f"{s.traceback[0].filename.split('/')[-1]}:{s.traceback[0].lineno} ({s.size_diff} B in {s.count_diff} blocks)" for s in stats[:TOP_SITES] ]
+    return { "peak": peak, "allocs": allocs, "sites": sites }
+
+if __name__ == '__main__':
+
+    args = sys.argv[1:]
+    update = "--update" in args
+    tolerance = DEFAULT_TOLERANCE
+    if "--tolerance" in args:
+        i = args.index("--tolerance")
+        tolerance = float(args[i + 1])
+        del args[i : i + 2]
+    param_types = [ arg for arg in args if arg != "--update" ] or NTRU_PARAM_TYPES
+
+    for param_type in param_types:
+        if param_type not in NTRU_PARAM_TYPES:
+            print(f"Incorrect ntru-type value '{param_type}'. Possible values are: {NTRU_PARAM_TYPES}")
+            exit(1)
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    regressions = []
+
+    for param_type in param_types:
+        ntru_tuple = unpack_ntru_tuple(NTRU_PARAMS[param_type])
+        for name, fn in _operations(ntru_tuple).items():
+            key = f"{name}/{param_type}"
+            result = measure(fn)
+
+            baseline = baselines.get(key, {}).get("peak")
+            status = ""
+            if update:
+                baselines[key] = { "peak": result["peak"] }
+            elif baseline is None:
+                status = "no baseline"
+            elif result["peak"] > baseline * (1 + tolerance):
+                status = f"REGRESSION (baseline {baseline} B)"
+                regressions.append(key)
+
+            print(f"[{'-' if status.startswith('REGRESSION') else '+'}] {key:<30} peak {result['peak']:>10} B  allocs {result['allocs']:>8}  {status}")
+            for site in result["sites"]:
+                print(f"      at peak {site}")
+
+    if update:
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"[+] Baselines stored in {BASELINE_PATH}")
+    elif regressions:
+        print(f"[-] Peak memory regressed for: {', '.join(regressions)}")
+        exit(1)
@@ -0,0 +1,69 @@
+from ntru_py.ntc.ntc import NTRU_PARAMS, NTRU_PARAM_TYPES, KEY_FORM_TERNARY, KEY_FORM_FAST_FP, ntc_to_str, unpack_ntru_tuple
+from ntru_py.poly.core import ntru_fast_fp_supported
+from ntru_py.poly.ntc_api import poly_generate_corpus
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
+import time
+
+# Sage-free generator of the testcases corpus
+#
+# usage: python3 ./scripts/export_poly.py <corpus.jsonl> [--count K] [--seed S] [--jobs J] [--fast-fp] [ntru-type ...]
+#
+# Generates K testcases for every params set (all by default) and appends them to the JSONL corpus,
+# one testcase per line. Testcases are generated in chunks by J worker processes and written
+# in order as soon as they are ready. With --seed the corpus is reproducible.
+DEFAULT_COUNT = 10
+CHUNK_CASES = 16
+
+def _generate_chunk(task: tuple) -> list[str]:
+    param_set, start, count, seed, key_form = task
+    return [ ntc_to_str(ntc) for ntc in poly_generate_corpus([ param_set ], count, seed, start, key_form) ]
+
+def _pop_option(args: list[str], name: str, default: str | None) -> str | None:
+    if name not in args:
+        return default
+    i = args.index(name)
+    value = args[i + 1]
+    del args[i : i + 2]
+    return value
+
+if __name__ == '__main__':
+
+    args = sys.argv[1:]
+    count = int(_pop_option(args, "--count", str(DEFAULT_COUNT)))
+    seed = _pop_option(args, "--seed", None)
+    jobs = int(_pop_option(args, "--jobs", str(os.cpu_count() or 1)))
+    key_form = KEY_FORM_FAST_FP if "--fast-fp" in args else KEY_FORM_TERNARY
+    args = [ arg for arg in args if arg != "--fast-fp" ]
+
+    if len(args) < 1:
+        print("usage: export_poly.py <corpus.jsonl> [--count K] [--seed S] [--jobs J] [--fast-fp] [ntru-type ...]")
+        exit(1)
+
+    corpus_path, param_types = args[0], args[1:] or NTRU_PARAM_TYPES
+    for param_type in param_types:
+        if param_type not in NTRU_PARAM_TYPES:
+            print(f"Incorrect ntru-type value '{param_type}'. Possible values are: {NTRU_PARAM_TYPES}")
+            exit(1)
+
+    # Keys in form f = 1 + pF are rejected for params where they can fail to decrypt
+    if key_form == KEY_FORM_FAST_FP:
+        unsupported = [ t for t in param_types if not ntru_fast_fp_supported(*unpack_ntru_tuple(NTRU_PARAMS[t])[1:]) ]
+        if unsupported:
+            print(f"Keys in form f = 1 + pF can fail to decrypt with params: {unsupported}")
+            exit(1)
+
+    seed = seed.encode() if seed is not None else None
+    tasks = [ (param_type, start, min(CHUNK_CASES, count - start), seed, key_form)
+              for param_type in param_types for start in range(0, count, CHUNK_CASES) ]
+
+    start_time = time.perf_counter()
+    n_cases = 0
+    with open(corpus_path, 'a') as corpus, ProcessPoolExecutor(jobs) as pool:
+        for lines in pool.map(_generate_chunk, tasks):
+            corpus.write("".join(line + "\n" for line in lines))
+            n_cases += len(lines)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"[+] {n_cases} testcases appended to {corpus_path} in {elapsed:.2f} s ({n_cases / elapsed:.1f} cases/s, {jobs} jobs)")
@@ -0,0 +1,20 @@
+from ntru_py.poly.core import POLY_CONV_STRATEGIES
+from ntru_py.poly.tuner import poly_tune, poly_store_profile
+import sys
+
+if __name__ == '__main__':
+
+    # Profile is stored under $NTRU_POLY_PROFILE or ~/.cache/ntru_py/poly_profile.json by default
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+
+    profile, timings = poly_tune()
+
+    names = list(POLY_CONV_STRATEGIES)
+    print(f"{'N':>5} {'class':>7} " + " ".join(f"{name:>13}" for name in names))
+    for (N, density_class), times in timings.items():
+        best = min(times, key=times.get)
+        cells = [ f"{times[name] * 1e3:10.3f}{'*' if name == best else ' '}ms" for name in names ]
+        print(f"{N:>5} {density_class:>7} " + " ".join(cells))
+
+    stored = poly_store_profile(profile, path)
+    print(f"[+] Profile stored in {stored}")
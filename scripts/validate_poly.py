@@ -1,9 +1,27 @@
 from pathlib import Path
-from ntru_py.ntc.ntc import ntc_from_str
-from ntru_py.poly.ntc_api import poly_validate_testcase
+from ntru_py.ntc.ntc import ntc_from_str, ntc_read_jsonl
+from ntru_py.poly.ntc_api import poly_validate_testcase, NTC_VALIDATE_MODES, NTC_VALIDATE_PRODUCT
+import sys
 
+# usage: python3 ./scripts/validate_poly.py [strict|product|spot] [corpus.jsonl]
+#
+# Without corpus every testcase in `assets` directory is validated
 if __name__ == '__main__':
 
+    args = sys.argv[1:]
+    mode = args.pop(0) if args and args[0] in NTC_VALIDATE_MODES else NTC_VALIDATE_PRODUCT
+
+    if args and not args[0].endswith(".jsonl"):
+        print(f"Incorrect validation mode '{args[0]}'. Possible values are: {NTC_VALIDATE_MODES}")
+        exit(1)
+
+    if args:
+        # Corpus is streamed, so it can be larger than the memory
+        with open(args[0]) as corpus:
+            n_valid = sum(1 for ntc in ntc_read_jsonl(corpus) if poly_validate_testcase(ntc, mode))
+        print(f"[+] Valid testcases - {n_valid} in {args[0]}")
+        exit(0)
+
     root_path = Path('assets')
 
     if not root_path.is_dir():
@@ -13,9 +31,8 @@ if __name__ == '__main__':
     for testcase in sorted(root_path.iterdir()):
         with open(testcase) as test_file:
             ntc = ntc_from_str(test_file.read())
-            valid = poly_validate_testcase(ntc)
+            valid = poly_validate_testcase(ntc, mode)
             if valid:
                 print(f"[+] Valid testcase - {testcase}")
             else:
                 print(f"[-] Invalid testcase - {testcase}")
-
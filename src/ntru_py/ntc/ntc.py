@@ -1,4 +1,5 @@
 from dataclasses import dataclass, asdict
+from typing import Iterable, Iterator, TextIO
 import json
 
 NtruTuple = tuple[int, int, int, int]
@@ -46,6 +47,13 @@ NTRU_PARAMS = {
 
 NTRU_PARAM_TYPES = list(NTRU_PARAMS.keys())
 
+# Forms of the private key f:
+# * ternary - f has d coeffs = +1 and d - 1 coeffs = -1
+# * 1+pF    - f = 1 + p * F, where F has d coeffs = +1 and d coeffs = -1, therefore fp = 1
+KEY_FORM_TERNARY = "ternary"
+KEY_FORM_FAST_FP = "1+pF"
+KEY_FORMS = [KEY_FORM_TERNARY, KEY_FORM_FAST_FP]
+
 # Representation of the polynomial as list of its coefficients
 # 
 # Length of the list (`len(PolyCoeffs)`) does not have to be equal to `N`,
@@ -72,6 +80,7 @@ class NtruTestCase:
     # f: polynomial with coeffs in {-1, 0, 1} such that:
     # * number of +1 is equal to d 
     # * number of -1 is equal to d - 1
+    # or f = 1 + p * F if `key_form` is equal to KEY_FORM_FAST_FP
     f: PolyCoeffs 
 
     # -- Plaintext and Ciphertext
@@ -95,6 +104,10 @@ class NtruTestCase:
     # * used during public key generation
     g: PolyCoeffs
 
+    # -- Key Form
+    # One of KEY_FORMS, testcases without this field use ternary f
+    key_form: str = KEY_FORM_TERNARY
+
 def ntc_to_dict(ntc: NtruTestCase) -> dict:
     return asdict(ntc)
 
@@ -107,3 +120,19 @@ def ntc_to_str(ntc: NtruTestCase) -> str:
 def ntc_from_str(ntc_str: str) -> NtruTestCase:
     return ntc_from_dict(json.loads(ntc_str))
 
+# Corpus of testcases is stored in JSON Lines format - one `ntc_to_str` per line,
+# so it can be appended to and read back without loading the whole file
+
+def ntc_write_jsonl(ntcs: Iterable[NtruTestCase], jsonl_file: TextIO) -> int:
+    """Append testcases to opened JSONL file, return number of written testcases"""
+    count = 0
+    for ntc in ntcs:
+        jsonl_file.write(ntc_to_str(ntc) + "\n")
+        count += 1
+    return count
+
+def ntc_read_jsonl(jsonl_file: TextIO) -> Iterator[NtruTestCase]:
+    """Read testcases one by one from opened JSONL file, blank lines are skipped"""
+    for line in jsonl_file:
+        if line.strip():
+            yield ntc_from_str(line)
@@ -1,4 +1,4 @@
-from ntru_py.ntc.ntc import PolyCoeffs, NtruTuple, unpack_ntru_tuple, pack_ntru_tuple
+from ntru_py.ntc.ntc import PolyCoeffs, NtruTuple, unpack_ntru_tuple, pack_ntru_tuple, KEY_FORM_TERNARY, KEY_FORMS
 from pathlib import Path
 import json
 
@@ -42,9 +42,10 @@ def _load_poly(ntru_tuple: NtruTuple, filename: str, poly_name: str) -> PolyCoef
     poly: PolyCoeffs = content[poly_name]
     return poly
 
-def _store_poly(filename: str, poly_name: str, poly: PolyCoeffs, ntru_tuple: NtruTuple):
+def _store_poly(filename: str, poly_name: str, poly: PolyCoeffs, ntru_tuple: NtruTuple, extra: dict | None = None):
     content_dict = pack_ntru_tuple(*ntru_tuple)
     content_dict[poly_name] = poly
+    content_dict.update(extra or {})
     content_str = json.dumps(content_dict)
 
     _store_json_file_content(filename, content_str)
@@ -52,8 +53,24 @@ def _store_poly(filename: str, poly_name: str, poly: PolyCoeffs, ntru_tuple: Ntr
 def load_sk(ntru_tuple: NtruTuple, filename: str = "sk.json") -> PolyCoeffs:
     return _load_poly(ntru_tuple, filename, "f")
 
-def store_sk(f: PolyCoeffs, ntru_tuple: NtruTuple, filename: str = "sk.json"):
-    _store_poly(filename, "f", f, ntru_tuple)
+def store_sk(f: PolyCoeffs, ntru_tuple: NtruTuple, filename: str = "sk.json", key_form: str = KEY_FORM_TERNARY):
+    # Key form is stored only if it differs from the default one
+    extra = {} if key_form == KEY_FORM_TERNARY else { "key_form": key_form }
+    _store_poly(filename, "f", f, ntru_tuple, extra)
+
+def load_sk_key_form(ntru_tuple: NtruTuple, filename: str = "sk.json") -> str:
+    content = json.loads(_load_json_file_content(filename))
+    loaded_ntru_tuple = unpack_ntru_tuple(content)
+
+    if loaded_ntru_tuple != ntru_tuple:
+        raise ValueError(f"Loaded NTRU params tuple: '{loaded_ntru_tuple}' is different than currently used tuple: {ntru_tuple}.")
+
+    key_form = content.get("key_form", KEY_FORM_TERNARY)
+
+    if key_form not in KEY_FORMS:
+        raise ValueError(f"Incorrect key form '{key_form}'. Possible values are: {KEY_FORMS}")
+
+    return key_form
 
 def load_pk(ntru_tuple: NtruTuple, filename: str = "pk.json") -> PolyCoeffs:
     return _load_poly(ntru_tuple, filename, "h")
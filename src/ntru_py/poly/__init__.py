@@ -0,0 +1,12 @@
+from .core import *
+from .sampler import *
+from .gf3 import *
+from .keyring import *
+from .batch import *
+from .ntc_api import *
+from .encryptor import *
+from .tuner import *
+from .threads import *
+from .kem import *
+from .swar import *
+from .packing import *
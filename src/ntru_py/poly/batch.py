@@ -0,0 +1,148 @@
+from ntru_py.ntc.ntc import PolyCoeffs
+
+from .core import poly_truncate_zeros, ntru_encrypt, ntru_decrypt, ntru_private_fp
+from .shared import shm_create, ShmRegistry
+
+from array import array
+from concurrent.futures import Executor
+from typing import Iterable
+import os
+
+# Layout of the shared memory block:
+#
+#   inputs  | n_rows x N coefficients
+#   outputs | n_rows x N coefficients
+#
+# Coefficients are stored as fixed-width int32 values, polynomials are padded with zeros up to N
+_COEFF = "i"
+_COEFF_SIZE = 4
+
+# Batches attached in the current process, workers detach at the end of every task
+# (see `_worker_rows`), so a long-lived pool does not keep closed batches mapped
+_attached_batches = ShmRegistry()
+
+class NtruSharedBatch:
+    """Rows of input and output polynomials with `N` coefficients each, stored in shared memory.
+
+    Batch is passed to worker processes by name, workers read inputs and write
+    outputs in place, so no polynomial is pickled between the processes.
+    """
+
+    def __init__(self, shm, n_rows: int, N: int, owner: bool = False):
+        self._shm = shm
+        self._owner = owner
+        self.n_rows = n_rows
+        self.N = N
+
+        coeffs = shm.buf.cast(_COEFF)
+        self._inputs = coeffs[: n_rows * N]
+        self._outputs = coeffs[n_rows * N : 2 * n_rows * N]
+        coeffs.release()
+
+    @classmethod
+    def create(cls, n_rows: int, N: int) -> "NtruSharedBatch":
+        shm = shm_create(max(1, 2 * n_rows * N * _COEFF_SIZE))
+        return cls(shm, n_rows, N, owner=True)
+
+    @classmethod
+    def from_polys(cls, polys: Iterable[PolyCoeffs], N: int) -> "NtruSharedBatch":
+        """Create batch with given polynomials as inputs"""
+        polys = list(polys)
+        batch = cls.create(len(polys), N)
+        for i, poly in enumerate(polys):
+            batch.set_input(i, poly)
+        return batch
+
+    @classmethod
+    def attach(cls, name: str, n_rows: int, N: int) -> "NtruSharedBatch":
+        """Attach to batch created by another process, once per process"""
+        return _attached_batches.attach(name, lambda shm: cls(shm, n_rows, N))
+
+    def __reduce__(self):
+        return (NtruSharedBatch.attach, (self.name, self.n_rows, self.N))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _set_row(self, rows: memoryview, i: int, poly: PolyCoeffs):
+        if len(poly) > self.N:
+            raise ValueError(f"Polynomial has more than N = {self.N} coefficients")
+        row = array(_COEFF, poly)
+        row.extend([ 0 ] * (self.N - len(poly)))
+        rows[i * self.N : (i + 1) * self.N] = memoryview(row)
+
+    def set_input(self, i: int, poly: PolyCoeffs):
+        self._set_row(self._inputs, i, poly)
+
+    def set_output(self, i: int, poly: PolyCoeffs):
+        self._set_row(self._outputs, i, poly)
+
+    def input_row(self, i: int) -> memoryview:
+        """Return view of `N` padded coefficients of the i-th input"""
+        return self._inputs[i * self.N : (i + 1) * self.N]
+
+    def output(self, i: int) -> PolyCoeffs:
+        """Return i-th output as a polynomial without padding zeros"""
+        return poly_truncate_zeros(self._outputs[i * self.N : (i + 1) * self.N].tolist())
+
+    def outputs(self) -> list[PolyCoeffs]:
+        return [ self.output(i) for i in range(self.n_rows) ]
+
+    def close(self):
+        if self._shm is None:
+            return
+
+        self._inputs.release()
+        self._outputs.release()
+
+        _attached_batches.discard(self._shm.name)
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _encrypt_rows(batch: NtruSharedBatch, start: int, stop: int, q: int, d: int, h: PolyCoeffs):
+    # Blinding polynomials are sampled from the OS CSPRNG instead of the Mersenne Twister of `random`,
+    # explicit source of random bytes also selects the bulk sampler
+    for i in range(start, stop):
+        batch.set_output(i, ntru_encrypt(batch.N, q, d, batch.input_row(i), h, os.urandom))
+
+def _decrypt_rows(batch: NtruSharedBatch, start: int, stop: int, p: int, q: int, f: PolyCoeffs, fp: PolyCoeffs):
+    for i in range(start, stop):
+        batch.set_output(i, ntru_decrypt(batch.N, p, q, batch.input_row(i), f, fp))
+
+def _worker_rows(fn, batch: NtruSharedBatch, start: int, stop: int, *args) -> int:
+    try:
+        fn(batch, start, stop, *args)
+    finally:
+        # Batch attached by a worker process is detached right away, the owner
+        # (also passed as is to thread pools) is closed only by the caller
+        if not batch._owner:
+            batch.close()
+    return stop - start
+
+def _run_rows(pool: Executor, batch: NtruSharedBatch, chunk_rows: int, fn, *args) -> int:
+    futures = [
+        pool.submit(_worker_rows, fn, batch, start, min(start + chunk_rows, batch.n_rows), *args)
+        for start in range(0, batch.n_rows, chunk_rows)
+    ]
+    return sum(future.result() for future in futures)
+
+def ntru_encrypt_shared(pool: Executor, batch: NtruSharedBatch, q: int, d: int, h: PolyCoeffs, chunk_rows: int = 64) -> int:
+    """Encrypt messages stored as inputs of `batch` into its outputs, return number of processed rows"""
+    return _run_rows(pool, batch, chunk_rows, _encrypt_rows, q, d, h)
+
+def ntru_decrypt_shared(pool: Executor, batch: NtruSharedBatch, p: int, q: int, f: PolyCoeffs, fp: PolyCoeffs | None = None, chunk_rows: int = 64) -> int:
+    """Decrypt ciphertexts stored as inputs of `batch` into its outputs, return number of processed rows"""
+    if fp is None:
+        # Derive fp once instead of in every worker
+        fp = ntru_private_fp(f, batch.N, p)
+
+    return _run_rows(pool, batch, chunk_rows, _decrypt_rows, p, q, f, fp)
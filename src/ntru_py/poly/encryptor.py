@@ -0,0 +1,105 @@
+from ntru_py.ntc.ntc import PolyCoeffs
+
+from .core import poly_truncate_zeros, ntru_blinding
+from .sampler import RandBytes
+from .swar import swar_layout, swar_pack, swar_unpack, swar_add
+
+import os
+import queue
+import threading
+
+class NtruEncryptor:
+    """Encryptor for a single public key `h` with a bounded pool of precomputed blinding values `h * r`.
+
+    Sampling `r` and the convolution do not depend on the message, so they run in a background
+    thread and `encrypt` is a single addition modulo q. Blinding values are stored packed (see swar.py),
+    so the addition is done on whole integers. When the pool is empty, blinding value
+    is computed on the request path, so encryption never waits for the background thread.
+    """
+
+    def __init__(self, N: int, q: int, d: int, h: PolyCoeffs, pool_size: int = 64, randbytes: RandBytes | None = None, start: bool = True):
+        if pool_size < 1:
+            raise ValueError("Pool size must be positive.")
+
+        self.N, self.q, self.d = N, q, d
+        self.h = list(h)
+        self._layout = swar_layout(N, q)
+
+        # Background thread and the request path may draw randomness at the same time,
+        # user-supplied source (e.g. `shake_drbg`) is not required to be thread-safe
+        self._randbytes = randbytes or os.urandom
+        self._rand_lock = threading.Lock()
+
+        self._pool = queue.Queue(maxsize=pool_size)
+        self._stop = threading.Event()
+        self._thread = None
+
+        if start:
+            self.start()
+
+    def _locked_randbytes(self, n: int) -> bytes:
+        # Only drawing of the random bytes is serialized, convolutions run concurrently
+        with self._rand_lock:
+            return self._randbytes(n)
+
+    def _blinding(self) -> int:
+        return swar_pack(ntru_blinding(self.N, self.q, self.d, self.h, self._locked_randbytes), self._layout)
+
+    def _refill(self):
+        while not self._stop.is_set():
+            hr = self._blinding()
+            # Wait for a free slot, but wake up regularly to notice `close`
+            while not self._stop.is_set():
+                try:
+                    self._pool.put(hr, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    def start(self):
+        """Start background refilling of the pool"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refill, name="ntru-encryptor-refill", daemon=True)
+        self._thread.start()
+
+    def fill(self):
+        """Fill the pool up to its capacity in the calling thread"""
+        while not self._pool.full():
+            try:
+                self._pool.put_nowait(self._blinding())
+            except queue.Full:
+                break
+
+    @property
+    def available(self) -> int:
+        """Number of precomputed blinding values"""
+        return self._pool.qsize()
+
+    def encrypt(self, m: PolyCoeffs) -> PolyCoeffs:
+        """Encrypt message `m`, same as `ntru_encrypt` with the public key of the encryptor"""
+        try:
+            hr = self._pool.get_nowait()
+        except queue.Empty:
+            hr = self._blinding()
+        return poly_truncate_zeros(swar_unpack(swar_add(hr, swar_pack(m, self._layout), self._layout), self._layout))
+
+    def close(self):
+        """Stop the background thread and drop precomputed values, each of them must be used only once"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+        while True:
+            try:
+                self._pool.get_nowait()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
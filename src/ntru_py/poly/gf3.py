@@ -0,0 +1,132 @@
+# Bit-sliced arithmetic of polynomials over GF(3)
+#
+# Polynomial is stored as two Python integers (bit planes): bit `i` of `pos` is set
+# when coefficient `i` is equal to 1 and bit `i` of `neg` when it is equal to 2 = -1.
+# Both bits are never set at the same time. Every operation below works on all
+# coefficients at once with a handful of bitwise operations on the planes.
+#
+# e.g. 2x^3 + x + 1 = -x^3 + x + 1 is stored as (pos, neg) = (0b0011, 0b1000)
+
+Gf3Poly = tuple[int, int]
+
+GF3_0 = (0, 0)
+GF3_1 = (1, 0)
+
+# Map ASCII digits '0' / '1' to values 0 / 1
+_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+# Map coefficients in {0, 1, 2} to ASCII bits of the plane
+_POS_BITS = bytes.maketrans(b"\x00\x01\x02", b"010")
+_NEG_BITS = bytes.maketrans(b"\x00\x01\x02", b"001")
+
+def gf3_from_poly(a: list[int]) -> Gf3Poly:
+    """Convert polynomial with integer coefficients into bit-sliced form modulo 3"""
+    if not a:
+        return GF3_0
+    # Highest coefficient goes first in the binary string
+    digits = bytes(x % 3 for x in reversed(a))
+    return int(digits.translate(_POS_BITS), 2), int(digits.translate(_NEG_BITS), 2)
+
+def gf3_to_poly(a: Gf3Poly, n: int | None = None, centered: bool = False) -> list[int]:
+    """Convert bit-sliced polynomial into coefficients in [0, 3) or [-1, 1] if `centered`, padded to `n` or without padding zeros"""
+    pos, neg = a
+    if n is None:
+        n = (pos | neg).bit_length()
+    if n == 0:
+        return []
+    pos_bits = format(pos, f"0{n}b").encode()[::-1].translate(_DIGITS)
+    neg_bits = format(neg, f"0{n}b").encode()[::-1].translate(_DIGITS)
+    if centered:
+        return [ x - y for x, y in zip(pos_bits, neg_bits) ]
+    return [ x + 2 * y for x, y in zip(pos_bits, neg_bits) ]
+
+def gf3_degree(a: Gf3Poly) -> int | None:
+    deg = (a[0] | a[1]).bit_length() - 1
+    return None if deg < 0 else deg
+
+def gf3_add(a: Gf3Poly, b: Gf3Poly) -> Gf3Poly:
+    a_pos, a_neg = a
+    b_pos, b_neg = b
+    a_zero = ~(a_pos | a_neg)
+    b_zero = ~(b_pos | b_neg)
+    # 1 = 1 + 0 = 0 + 1 = 2 + 2,  2 = 2 + 0 = 0 + 2 = 1 + 1
+    pos = (a_pos & b_zero) | (b_pos & a_zero) | (a_neg & b_neg)
+    neg = (a_neg & b_zero) | (b_neg & a_zero) | (a_pos & b_pos)
+    return pos, neg
+
+def gf3_neg(a: Gf3Poly) -> Gf3Poly:
+    return a[1], a[0]
+
+def gf3_sub(a: Gf3Poly, b: Gf3Poly) -> Gf3Poly:
+    return gf3_add(a, (b[1], b[0]))
+
+def gf3_mul_scalar(a: Gf3Poly, v: int) -> Gf3Poly:
+    v %= 3
+    if v == 0:
+        return GF3_0
+    return a if v == 1 else (a[1], a[0])
+
+def gf3_shift(a: Gf3Poly, k: int) -> Gf3Poly:
+    """Multiply `a` by X^k"""
+    return a[0] << k, a[1] << k
+
+def gf3_rotate(a: Gf3Poly, k: int, N: int) -> Gf3Poly:
+    """Multiply `a` of degree < N by X^k modulo X^N - 1"""
+    k %= N
+    mask = (1 << N) - 1
+    pos, neg = a
+    return ((pos << k) & mask) | (pos >> (N - k)), ((neg << k) & mask) | (neg >> (N - k))
+
+def _bit_indices(x: int):
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+def gf3_circ_conv(a: Gf3Poly, b: Gf3Poly, N: int) -> Gf3Poly:
+    """Circular convolution modulo (X^N - 1) of polynomials with degree < N"""
+
+    # Iterate over nonzero coefficients of the sparser operand
+    if bin(a[0] | a[1]).count("1") < bin(b[0] | b[1]).count("1"):
+        a, b = b, a
+
+    acc = GF3_0
+    for i in _bit_indices(b[0]):
+        acc = gf3_add(acc, gf3_rotate(a, i, N))
+    for i in _bit_indices(b[1]):
+        acc = gf3_sub(acc, gf3_rotate(a, i, N))
+    return acc
+
+def gf3_inv(a: Gf3Poly, M: Gf3Poly) -> Gf3Poly:
+    """Calculate `a^-1` modulo `M` over GF(3), raise ValueError if they are not coprime"""
+
+    # Euclid's algorithm tracking only the Bezout coefficient of `a`:
+    #   s0 * a = r0, s1 * a = r1  (mod M)
+    r0, r1 = M, a
+    s0, s1 = GF3_0, GF3_1
+
+    while r1[0] | r1[1]:
+        deg_r1 = gf3_degree(r1)
+        # Leading coefficient is its own inverse in GF(3)
+        lc_r1 = 1 if r1[0] >> deg_r1 & 1 else 2
+
+        # Eliminate leading terms of r0 one by one, instead of calculating the quotient
+        while (deg_r0 := gf3_degree(r0)) is not None and deg_r0 >= deg_r1:
+            shift = deg_r0 - deg_r1
+            lc_r0 = 1 if r0[0] >> deg_r0 & 1 else 2
+
+            # c = lc(r0) / lc(r1) = lc(r0) * lc(r1)
+            if lc_r0 == lc_r1:
+                r0 = gf3_sub(r0, gf3_shift(r1, shift))
+                s0 = gf3_sub(s0, gf3_shift(s1, shift))
+            else:
+                r0 = gf3_add(r0, gf3_shift(r1, shift))
+                s0 = gf3_add(s0, gf3_shift(s1, shift))
+
+        r0, r1 = r1, r0
+        s0, s1 = s1, s0
+
+    # Greatest common divisor must be a constant, 1 or 2 = -1
+    if gf3_degree(r0) != 0:
+        raise ValueError("Polynomials are not coprime")
+
+    return s0 if r0 == GF3_1 else gf3_neg(s0)
@@ -0,0 +1,159 @@
+from ntru_py.ntc.ntc import NtruTuple, PolyCoeffs
+
+from .core import ntru_random_message, ntru_encrypt, ntru_decrypt
+from .sampler import RandBytes
+
+from typing import BinaryIO
+import hashlib
+import hmac
+import io
+import os
+import struct
+
+# Hybrid KEM/DEM mode
+#
+# KEM: random message m is encrypted with NTRU, the session keys are derived
+#      with SHAKE-256 from the NTRU params, m and its ciphertext c
+# DEM: payload is split into chunks, every chunk is XOR-ed with its own SHAKE-256 keystream
+#      and authenticated with HMAC-SHA256 over (index, final flag, ciphertext). The final flag
+#      (as in the STREAM construction) makes reordering and truncation of the chunks detectable.
+#
+# Layout of the file:
+#
+#   header | magic, version, N, p, q, d, chunk size
+#   c      | N coefficients of the NTRU ciphertext, each in `_kem_coeff_size(q)` bytes
+#   chunks | for each chunk: length, final flag, encrypted data, tag
+KEM_MAGIC = b"NTKM"
+KEM_VERSION = 1
+KEM_CHUNK_SIZE = 1 << 16
+
+_HEADER = struct.Struct("<4sBIIIII")
+_CHUNK = struct.Struct("<IB")
+_TAG_SIZE = 32
+_KEY_SIZE = 32
+
+def _kem_coeff_size(m: int) -> int:
+    return ((m - 1).bit_length() + 7) // 8
+
+def _kem_encode(a: PolyCoeffs, N: int, m: int) -> bytes:
+    """Encode polynomial of degree < N with coefficients reduced modulo `m` in fixed width"""
+    size = _kem_coeff_size(m)
+    return b"".join((x % m).to_bytes(size, 'little') for x in list(a) + [ 0 ] * (N - len(a)))
+
+def _kem_decode(data: bytes, N: int, m: int) -> PolyCoeffs:
+    size = _kem_coeff_size(m)
+    return [ int.from_bytes(data[i * size : (i + 1) * size], 'little') for i in range(N) ]
+
+def _kem_derive_keys(ntru_tuple: NtruTuple, m: PolyCoeffs, c: PolyCoeffs) -> tuple[bytes, bytes]:
+    """Return `(enc_key, mac_key)` derived from the encapsulated message and its ciphertext"""
+    N, p, q, d = ntru_tuple
+    xof = hashlib.shake_256(b"ntru_py/kem/v1")
+    xof.update(struct.pack("<4I", N, p, q, d))
+    # Both polynomials are padded to N, so their encoding is unique
+    xof.update(_kem_encode(m, N, p))
+    xof.update(_kem_encode(c, N, q))
+    keys = xof.digest(2 * _KEY_SIZE)
+    return keys[:_KEY_SIZE], keys[_KEY_SIZE:]
+
+def ntru_kem_encapsulate(ntru_tuple: NtruTuple, h: PolyCoeffs, randbytes: RandBytes | None = None) -> tuple[bytes, bytes, PolyCoeffs]:
+    """Encapsulate fresh session secret for public key `h`, return `(enc_key, mac_key, c)`"""
+    N, p, q, d = ntru_tuple
+    randbytes = randbytes or os.urandom
+    m = ntru_random_message(N, p, randbytes)
+    c = ntru_encrypt(N, q, d, m, h, randbytes)
+    return (*_kem_derive_keys(ntru_tuple, m, c), c)
+
+def ntru_kem_decapsulate(ntru_tuple: NtruTuple, c: PolyCoeffs, f: PolyCoeffs, fp: PolyCoeffs | None = None) -> tuple[bytes, bytes]:
+    """Recover `(enc_key, mac_key)` from ciphertext `c` with private key `f`"""
+    N, p, q, d = ntru_tuple
+    m = ntru_decrypt(N, p, q, c, f, fp)
+    return _kem_derive_keys(ntru_tuple, m, c)
+
+def _dem_chunk(enc_key: bytes, mac_key: bytes, index: int, final: bool, data: bytes, decrypt: bool) -> tuple[bytes, bytes]:
+    """Return `(output, tag)`, tag is always computed over the encrypted data"""
+    nonce = index.to_bytes(8, 'little') + bytes([ final ])
+    stream = hashlib.shake_256(enc_key + nonce).digest(len(data))
+    # XOR of the whole chunk at once on Python integers
+    output = (int.from_bytes(data, 'little') ^ int.from_bytes(stream, 'little')).to_bytes(len(data), 'little')
+    tag = hmac.new(mac_key, nonce + (data if decrypt else output), hashlib.sha256).digest()
+    return output, tag
+
+def _read_exact(src: BinaryIO, n: int) -> bytes:
+    data = src.read(n)
+    if len(data) != n:
+        raise ValueError("KEM file is truncated")
+    return data
+
+def ntru_kem_encrypt_stream(ntru_tuple: NtruTuple, h: PolyCoeffs, src: BinaryIO, dst: BinaryIO,
+                            chunk_size: int = KEM_CHUNK_SIZE, randbytes: RandBytes | None = None) -> int:
+    """Encrypt whole `src` stream into `dst` for public key `h`, return number of encrypted bytes"""
+    N, p, q, d = ntru_tuple
+    if not 0 < chunk_size < 1 << 32:
+        raise ValueError("Chunk size must be positive and fit into 32 bits.")
+
+    enc_key, mac_key, c = ntru_kem_encapsulate(ntru_tuple, h, randbytes)
+    dst.write(_HEADER.pack(KEM_MAGIC, KEM_VERSION, N, p, q, d, chunk_size))
+    dst.write(_kem_encode(c, N, q))
+
+    # Chunk is final if there is nothing after it, so one chunk is always read ahead
+    n_bytes, index = 0, 0
+    data = src.read(chunk_size)
+    while True:
+        next_data = src.read(chunk_size)
+        final = len(next_data) == 0
+
+        output, tag = _dem_chunk(enc_key, mac_key, index, final, data, decrypt=False)
+        dst.write(_CHUNK.pack(len(output), final))
+        dst.write(output)
+        dst.write(tag)
+
+        n_bytes += len(data)
+        if final:
+            return n_bytes
+        data, index = next_data, index + 1
+
+def ntru_kem_decrypt_stream(ntru_tuple: NtruTuple, f: PolyCoeffs, src: BinaryIO, dst: BinaryIO, fp: PolyCoeffs | None = None) -> int:
+    """Decrypt `src` stream created by `ntru_kem_encrypt_stream` into `dst`, return number of decrypted bytes.
+
+    Every chunk is written only after its tag is verified, ValueError is raised on the first invalid one.
+    """
+    N, p, q, d = ntru_tuple
+    magic, version, *file_tuple, chunk_size = _HEADER.unpack(_read_exact(src, _HEADER.size))
+    if magic != KEM_MAGIC or version != KEM_VERSION:
+        raise ValueError("File is not a valid NTRU KEM file")
+    if tuple(file_tuple) != tuple(ntru_tuple):
+        raise ValueError(f"File NTRU params tuple: '{tuple(file_tuple)}' is different than currently used tuple: {ntru_tuple}.")
+
+    c = _kem_decode(_read_exact(src, N * _kem_coeff_size(q)), N, q)
+    enc_key, mac_key = ntru_kem_decapsulate(ntru_tuple, c, f, fp)
+
+    n_bytes, index = 0, 0
+    while True:
+        length, final = _CHUNK.unpack(_read_exact(src, _CHUNK.size))
+        if length > chunk_size:
+            raise ValueError("KEM file contains chunk larger than declared")
+        data = _read_exact(src, length)
+        tag = _read_exact(src, _TAG_SIZE)
+
+        output, expected_tag = _dem_chunk(enc_key, mac_key, index, bool(final), data, decrypt=True)
+        if not hmac.compare_digest(tag, expected_tag):
+            raise ValueError(f"Authentication of chunk {index} failed")
+
+        dst.write(output)
+        n_bytes += length
+        if final:
+            if src.read(1):
+                raise ValueError("KEM file contains data after the final chunk")
+            return n_bytes
+        index += 1
+
+def ntru_kem_encrypt_bytes(ntru_tuple: NtruTuple, h: PolyCoeffs, data: bytes, chunk_size: int = KEM_CHUNK_SIZE,
+                           randbytes: RandBytes | None = None) -> bytes:
+    dst = io.BytesIO()
+    ntru_kem_encrypt_stream(ntru_tuple, h, io.BytesIO(data), dst, chunk_size, randbytes)
+    return dst.getvalue()
+
+def ntru_kem_decrypt_bytes(ntru_tuple: NtruTuple, f: PolyCoeffs, data: bytes, fp: PolyCoeffs | None = None) -> bytes:
+    dst = io.BytesIO()
+    ntru_kem_decrypt_stream(ntru_tuple, f, io.BytesIO(data), dst, fp)
+    return dst.getvalue()
@@ -0,0 +1,159 @@
+from ntru_py.ntc.ntc import NtruTuple, PolyCoeffs
+from ntru_py.ntc.ntc_json import load_sk
+
+from .core import POLY_1, poly_truncate_zeros, ntru_decrypt, ntru_private_fp
+from .shared import shm_create, ShmRegistry
+
+from array import array
+from typing import Iterable
+import hashlib
+import json
+import struct
+
+# Layout of the shared memory block:
+#
+#   header  | magic, version, number of keys
+#   entries | for each key: fingerprint, N, p, q, d, offset of its data
+#   data    | for each key: f (N coefficients) followed by fp (N coefficients)
+#
+# Coefficients are stored as fixed-width int32 values, padded with zeros up to N
+KEYRING_MAGIC = b"NTKR"
+KEYRING_VERSION = 1
+
+_HEADER = struct.Struct("<4sII")
+_ENTRY = struct.Struct("<16s5i")
+_COEFF = "i"
+
+# Keyrings attached in the current process, so workers receiving the same
+# keyring with every task attach to the shared memory only once
+_attached_keyrings = ShmRegistry()
+
+def ntru_key_fingerprint(ntru_tuple: NtruTuple, f: PolyCoeffs) -> str:
+    """Return hex fingerprint identifying private key `f` for given NTRU params"""
+    canonical = json.dumps([ *ntru_tuple, poly_truncate_zeros(list(f)) ])
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+class NtruKeyring:
+    """Read-only collection of private keys `f` with precomputed `fp` stored in one shared memory block.
+
+    Keyring is created once with `NtruKeyring.create` and can be passed to worker processes
+    (as a task argument or by its `name`), which attach to the same memory without copying.
+    """
+
+    def __init__(self, shm, owner: bool = False):
+        self._shm = shm
+        self._owner = owner
+
+        # All views handed out by the keyring are read-only slices of this buffer
+        self._buf = shm.buf.toreadonly()
+        self._coeffs = self._buf.cast(_COEFF)
+        self._index = {}
+        # Keys in form f = 1 + pF, decrypted with fp = 1 and a single convolution
+        self._fast_fp = set()
+
+        magic, version, n_keys = _HEADER.unpack_from(self._buf, 0)
+        if magic != KEYRING_MAGIC or version != KEYRING_VERSION:
+            raise ValueError("Shared memory block does not contain a valid NTRU keyring")
+
+        for i in range(n_keys):
+            fingerprint, N, p, q, d, offset = _ENTRY.unpack_from(self._buf, _HEADER.size + i * _ENTRY.size)
+            f = self._coeffs[offset : offset + N]
+            fp = self._coeffs[offset + N : offset + 2 * N]
+            self._index[fingerprint.hex()] = ((N, p, q, d), f, fp)
+            # Stored fp is padded to N, so it is compared by content
+            if fp[0] == 1 and not any(fp[1:]):
+                self._fast_fp.add(fingerprint.hex())
+
+    @classmethod
+    def create(cls, keys: Iterable[tuple[NtruTuple, PolyCoeffs]]) -> "NtruKeyring":
+        """Create keyring from `(ntru_tuple, f)` pairs, precomputing `fp` for every key"""
+
+        entries = {}
+        for ntru_tuple, f in keys:
+            N, p, q, d = ntru_tuple
+            fingerprint = ntru_key_fingerprint(ntru_tuple, f)
+            if fingerprint in entries:
+                raise ValueError(f"Key {fingerprint} is present more than once")
+
+            fp = ntru_private_fp(f, N, p)
+            entries[fingerprint] = (ntru_tuple, f, fp)
+
+        data = array(_COEFF)
+        header_size = _HEADER.size + len(entries) * _ENTRY.size
+        shm = shm_create(header_size + sum(2 * t[0] for t, _, _ in entries.values()) * data.itemsize)
+
+        _HEADER.pack_into(shm.buf, 0, KEYRING_MAGIC, KEYRING_VERSION, len(entries))
+        for i, (fingerprint, (ntru_tuple, f, fp)) in enumerate(entries.items()):
+            N = ntru_tuple[0]
+            offset = header_size // data.itemsize + len(data)
+            _ENTRY.pack_into(shm.buf, _HEADER.size + i * _ENTRY.size, bytes.fromhex(fingerprint), *ntru_tuple, offset)
+
+            data.extend(f); data.extend([ 0 ] * (N - len(f)))
+            data.extend(fp); data.extend([ 0 ] * (N - len(fp)))
+
+        shm.buf[header_size : header_size + len(data) * data.itemsize] = data.tobytes()
+        return cls(shm, owner=True)
+
+    @classmethod
+    def from_files(cls, key_files: Iterable[tuple[NtruTuple, str]]) -> "NtruKeyring":
+        """Create keyring from `(ntru_tuple, sk.json)` pairs"""
+        return cls.create((ntru_tuple, load_sk(ntru_tuple, filename)) for ntru_tuple, filename in key_files)
+
+    @classmethod
+    def attach(cls, name: str) -> "NtruKeyring":
+        """Attach to keyring created by another process, once per process"""
+        return _attached_keyrings.attach(name, cls)
+
+    def __reduce__(self):
+        # Only the name of the shared memory block is sent to worker processes
+        return (NtruKeyring.attach, (self.name,))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def fingerprints(self) -> list[str]:
+        return list(self._index.keys())
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._index
+
+    def get(self, fingerprint: str) -> tuple[NtruTuple, memoryview, memoryview]:
+        """Return `(ntru_tuple, f, fp)` for given key, `f` and `fp` are read-only views of the shared memory"""
+        if fingerprint not in self._index:
+            raise KeyError(f"Key {fingerprint} is not present in the keyring")
+        return self._index[fingerprint]
+
+    def decrypt(self, fingerprint: str, c: PolyCoeffs) -> PolyCoeffs:
+        """Decrypt ciphertext `c` with given key using its precomputed `fp`"""
+        (N, p, q, _), f, fp = self.get(fingerprint)
+        if fingerprint in self._fast_fp:
+            fp = POLY_1
+        return ntru_decrypt(N, p, q, c, f, fp)
+
+    def close(self):
+        """Detach from the shared memory, views returned by `get` cannot be used afterwards"""
+        if self._shm is None:
+            return
+
+        for _, f, fp in self._index.values():
+            f.release(); fp.release()
+        self._index = {}
+        self._fast_fp = set()
+        self._coeffs.release()
+        self._buf.release()
+
+        _attached_keyrings.discard(self._shm.name)
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,28 +1,53 @@
-from ntru_py.ntc.ntc import NtruTestCase
+from ntru_py.ntc.ntc import NtruTestCase, NTRU_PARAMS, KEY_FORM_TERNARY, KEY_FORM_FAST_FP, KEY_FORMS, unpack_ntru_tuple
 from ntru_py.poly.core import *
+from ntru_py.poly.sampler import RandBytes, shake_drbg
 
+from typing import Iterator
 import math
 
-def poly_validate_testcase(ntc: NtruTestCase) -> bool:
+# Validation modes of the testcases:
+# * strict  - fp and fq are recomputed from f and compared with the stored ones
+# * product - f * fp = 1 and f * fq = 1 are checked by single ring products, inverses are unique,
+#             so together with canonical form of fp and fq it is equivalent to the strict mode
+# * spot    - as above, but only few random coefficients of the products are checked
+NTC_VALIDATE_STRICT = "strict"
+NTC_VALIDATE_PRODUCT = "product"
+NTC_VALIDATE_SPOT = "spot"
+NTC_VALIDATE_MODES = [NTC_VALIDATE_STRICT, NTC_VALIDATE_PRODUCT, NTC_VALIDATE_SPOT]
+
+def _ntc_is_canonical(a: list[int], N: int, m: int) -> bool:
+    """Check that polynomial has at most N coefficients in range [0 : m) and no trailing zeros"""
+    return len(a) <= N and all(0 <= x < m for x in a) and poly_truncate_zeros(a) == a
+
+def poly_validate_testcase(ntc: NtruTestCase, mode: str = NTC_VALIDATE_PRODUCT) -> bool:
+    if mode not in NTC_VALIDATE_MODES:
+        raise ValueError(f"Incorrect validation mode '{mode}'. Possible values are: {NTC_VALIDATE_MODES}")
 
     # M = x^N - 1
     M = [ 0 ] * (ntc.N + 1)
     M[ntc.N], M[0] = (1, -1)
 
-    # Test inversion
-    # a) mod p
-    my_fp = poly_inv_modprime(ntc.f, M, ntc.p)
-    if my_fp != ntc.fp:
-        raise ValueError("Fp differ")
-
-    # b) mod q
     q_exp = int(math.log2(ntc.q))
     if 2 ** q_exp != ntc.q:
         raise ValueError("q is not a power of 2")
 
-    my_fq = poly_inv_modexp(ntc.f, M, 2, q_exp)
-    if my_fq != ntc.fq:
-        raise ValueError("Fq differ")
+    # Test inversion
+    if mode == NTC_VALIDATE_STRICT:
+        # a) mod p
+        my_fp = poly_inv_modprime(ntc.f, M, ntc.p)
+        if my_fp != ntc.fp:
+            raise ValueError("Fp differ")
+
+        # b) mod q
+        my_fq = poly_inv_modexp(ntc.f, M, 2, q_exp)
+        if my_fq != ntc.fq:
+            raise ValueError("Fq differ")
+    else:
+        verify = VERIFY_FULL if mode == NTC_VALIDATE_PRODUCT else VERIFY_CHEAP
+        if not _ntc_is_canonical(ntc.fp, ntc.N, ntc.p) or not poly_verify_inverse(ntc.f, ntc.fp, M, ntc.p, verify):
+            raise ValueError("Fp differ")
+        if not _ntc_is_canonical(ntc.fq, ntc.N, ntc.q) or not poly_verify_inverse(ntc.f, ntc.fq, M, ntc.q, verify):
+            raise ValueError("Fq differ")
 
     # Test encryption
     hr = poly_mul_mod_mod(ntc.h, ntc.r, M, ntc.q)
@@ -32,9 +57,40 @@ def poly_validate_testcase(ntc: NtruTestCase) -> bool:
     if my_c != ntc.c:
         raise ValueError("Ciphertexts c differ")
 
-    # Test decryption
-    my_m = ntru_decrypt(ntc.N, ntc.p, ntc.q, ntc.c, ntc.f)
+    # Test decryption, strict mode derives fp once again instead of using the stored one
+    fp = None if mode == NTC_VALIDATE_STRICT else ntc.fp
+    my_m = ntru_decrypt(ntc.N, ntc.p, ntc.q, ntc.c, ntc.f, fp)
     if my_m != ntc.m:
         raise ValueError("Messages m differ")
 
     return True
+
+def poly_generate_testcase(param_set: str, randbytes: RandBytes | None = None, key_form: str = KEY_FORM_TERNARY) -> NtruTestCase:
+    """Generate testcase with the poly backend, counterpart of `sage_generate_testcase`"""
+
+    if param_set not in NTRU_PARAMS:
+        raise ValueError(f"Incorrect param set string provided {param_set}. Possible values are: {list(NTRU_PARAMS)}")
+    if key_form not in KEY_FORMS:
+        raise ValueError(f"Incorrect key form '{key_form}'. Possible values are: {KEY_FORMS}")
+
+    N, p, q, d = unpack_ntru_tuple(NTRU_PARAMS[param_set])
+
+    h, f, fp, fq, g = ntru_keygen_ext(N, p, q, d, randbytes=randbytes, fast_fp=(key_form == KEY_FORM_FAST_FP))
+    m = ntru_random_message(N, p, randbytes)
+    c, r = ntru_encrypt_ext(N, q, d, m, h, randbytes)
+
+    return NtruTestCase(N, p, q, d, h, f, m, c, fp, fq, r, g, key_form)
+
+def poly_generate_corpus(param_sets: list[str], count: int, seed: bytes | None = None, start: int = 0,
+                         key_form: str = KEY_FORM_TERNARY) -> Iterator[NtruTestCase]:
+    """Lazily generate `count` testcases for every param set.
+
+    With `seed` every testcase has its own random stream derived from the seed, param set and index,
+    so any range of a corpus (see `start`) can be regenerated independently, e.g. in parallel.
+    """
+    for param_set in param_sets:
+        for index in range(start, start + count):
+            randbytes = None
+            if seed is not None:
+                randbytes = shake_drbg(seed + f"/ntc/{param_set}/{index}".encode())
+            yield poly_generate_testcase(param_set, randbytes, key_form)
@@ -0,0 +1,131 @@
+from ntru_py.ntc.ntc import NtruTuple, PolyCoeffs
+
+from .core import poly_center_mod, poly_truncate_zeros, ntru_encrypt, ntru_decrypt_batch
+from .sampler import RandBytes
+
+import math
+
+# Packing of short payloads into message polynomials
+#
+# Payloads are framed and concatenated into a single byte string, which is read as
+# a little-endian integer and written in base p into the N coefficients of the message
+# (centered, so for p = 3 they are in {-1, 0, 1}). Message has N * log2(p) bits
+# of capacity, e.g. 162 bytes for N = 821, p = 3.
+#
+# Framing (all integers are LEB128 varints):
+#
+#   count   | number of payloads
+#   payload | length, data - repeated `count` times
+#
+# Trailing zero bytes of the packed string are not stored in the integer, so
+# they are restored by reading exactly `capacity` bytes back.
+
+# Number of base-p digits converted at once on machine-sized integers
+_DIGITS_BITS = 60
+
+def _varint_encode(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _varint_decode(data: bytes, pos: int) -> tuple[int, int]:
+    """Return `(value, pos)` where `pos` is the position right after the varint"""
+    value, shift = 0, 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Packed message is truncated")
+        byte = data[pos]
+        value |= (byte & 0x7F) << shift
+        pos, shift = pos + 1, shift + 7
+        if byte < 0x80:
+            return value, pos
+
+def ntru_pack_capacity(N: int, p: int) -> int:
+    """Return number of bytes which fit into a message polynomial with N coefficients modulo `p`"""
+    return int(N * math.log2(p)) // 8
+
+def _digits_chunk(p: int) -> int:
+    return max(1, int(_DIGITS_BITS / math.log2(p)))
+
+def _int_to_digits(x: int, N: int, p: int) -> list[int]:
+    # Big integer is split into chunks of k digits, every chunk is split on small integers
+    k = _digits_chunk(p)
+    pk = p ** k
+    digits = []
+    while len(digits) < N:
+        x, chunk = divmod(x, pk)
+        for _ in range(k):
+            chunk, digit = divmod(chunk, p)
+            digits.append(digit)
+    return digits[:N]
+
+def _digits_to_int(digits: list[int], p: int) -> int:
+    k = _digits_chunk(p)
+    pk = p ** k
+    x = 0
+    for start in reversed(range(0, len(digits), k)):
+        chunk = 0
+        for digit in reversed(digits[start : start + k]):
+            chunk = chunk * p + digit
+        x = x * pk + chunk
+    return x
+
+def _packed_size(payloads: list[bytes]) -> int:
+    return len(_varint_encode(len(payloads))) + sum(len(_varint_encode(len(data))) + len(data) for data in payloads)
+
+def ntru_pack_message(payloads: list[bytes], N: int, p: int) -> PolyCoeffs:
+    """Pack payloads into a single message polynomial, raise ValueError if they do not fit"""
+    packed = _varint_encode(len(payloads)) + b"".join(_varint_encode(len(data)) + data for data in payloads)
+    if len(packed) > ntru_pack_capacity(N, p):
+        raise ValueError(f"Payloads take {len(packed)} bytes, message can hold only {ntru_pack_capacity(N, p)} bytes.")
+
+    digits = _int_to_digits(int.from_bytes(packed, 'little'), N, p)
+    return poly_truncate_zeros(poly_center_mod(digits, p))
+
+def ntru_unpack_message(m: PolyCoeffs, N: int, p: int) -> list[bytes]:
+    """Recover payloads packed by `ntru_pack_message` from (decrypted) message `m`"""
+    if len(m) > N:
+        raise ValueError(f"Message has more than N = {N} coefficients")
+
+    capacity = ntru_pack_capacity(N, p)
+    x = _digits_to_int([ x % p for x in m ], p)
+    if x >= 1 << (8 * capacity):
+        raise ValueError("Message is not a packed message")
+    packed = x.to_bytes(capacity, 'little')
+
+    count, pos = _varint_decode(packed, 0)
+    payloads = []
+    for _ in range(count):
+        length, pos = _varint_decode(packed, pos)
+        if pos + length > capacity:
+            raise ValueError("Packed message is truncated")
+        payloads.append(packed[pos : pos + length])
+        pos += length
+    return payloads
+
+def ntru_pack_messages(payloads: list[bytes], N: int, p: int) -> list[PolyCoeffs]:
+    """Pack payloads in order into as few message polynomials as possible, each payload is never split"""
+    capacity = ntru_pack_capacity(N, p)
+    messages, group = [], []
+    for data in payloads:
+        if group and _packed_size(group + [ data ]) > capacity:
+            messages.append(ntru_pack_message(group, N, p))
+            group = []
+        group.append(data)
+    if group:
+        messages.append(ntru_pack_message(group, N, p))
+    return messages
+
+def ntru_encrypt_payloads(ntru_tuple: NtruTuple, payloads: list[bytes], h: PolyCoeffs, randbytes: RandBytes | None = None) -> list[PolyCoeffs]:
+    """Encrypt payloads for public key `h` with a single encryption per packed message"""
+    N, p, q, d = ntru_tuple
+    return [ ntru_encrypt(N, q, d, m, h, randbytes) for m in ntru_pack_messages(payloads, N, p) ]
+
+def ntru_decrypt_payloads(ntru_tuple: NtruTuple, ciphertexts: list[PolyCoeffs], f: PolyCoeffs, fp: PolyCoeffs | None = None) -> list[bytes]:
+    """Decrypt ciphertexts created by `ntru_encrypt_payloads`, return payloads in their original order"""
+    N, p, q, d = ntru_tuple
+    messages = ntru_decrypt_batch(N, p, q, ciphertexts, f, fp)
+    return [ data for m in messages for data in ntru_unpack_message(m, N, p) ]
@@ -0,0 +1,117 @@
+from array import array
+from typing import Callable
+import hashlib
+import sys
+
+# Source of randomness used by the bulk samplers: any callable that
+# returns `n` random bytes, e.g. `os.urandom` or `shake_drbg(seed)`
+RandBytes = Callable[[int], bytes]
+
+# Each Fisher-Yates step consumes one 16-bit word, so N must fit in it
+SAMPLER_MAX_N = 1 << 16
+
+def shake_drbg(seed: bytes) -> RandBytes:
+    """Return deterministic source of random bytes expanding `seed` with SHAKE-256"""
+
+    counter = 0
+
+    def randbytes(n: int) -> bytes:
+        nonlocal counter
+        # Every request is an independent SHAKE stream keyed with (seed, counter)
+        block = hashlib.shake_256(seed + counter.to_bytes(8, 'little')).digest(n)
+        counter += 1
+        return block
+
+    return randbytes
+
+def _random_words(randbytes: RandBytes, n: int) -> array:
+    """Draw `n` uniformly random 16-bit words from a single buffer"""
+    words = array('H', randbytes(2 * n))
+    # Keep the stream endianness independent, so seeded runs are portable
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+def ntru_random_poly_batch(N: int, d_pos: int, d_neg: int, k: int, randbytes: RandBytes, dense: bool = True) -> list:
+    """Generate `k` random polynomials with `d_pos` 1's and `d_neg` -1's from one random buffer.
+
+    Dense form is a list of `N` coefficients, index form is a tuple `(pos, neg)` of index lists.
+    """
+
+    d_sum = d_pos + d_neg
+    if d_sum > N:
+        raise ValueError("Number of nonzero coefficients cannot exceed N.")
+    if N > SAMPLER_MAX_N:
+        raise ValueError(f"Bulk sampler supports N up to {SAMPLER_MAX_N}.")
+
+    # Rejection thresholds for every partial Fisher-Yates step: in step `i`
+    # we need a uniform index in [i, N) so only words below `limits[i]` are accepted
+    limits = [ SAMPLER_MAX_N - SAMPLER_MAX_N % (N - i) for i in range(d_sum) ]
+
+    # Single buffer for the whole batch, rejections are refilled on demand
+    words = _random_words(randbytes, k * d_sum + 16)
+    w = 0
+
+    polys = []
+    for _ in range(k):
+        indices = list(range(N))
+
+        for i in range(d_sum):
+            while True:
+                if w == len(words):
+                    words, w = _random_words(randbytes, d_sum + 16), 0
+                word = words[w]
+                w += 1
+                if word < limits[i]:
+                    break
+
+            j = i + word % (N - i)
+            indices[i], indices[j] = indices[j], indices[i]
+
+        # Selected indices come in uniformly random order, so first
+        # d_pos of them can be assigned +1 and the remaining ones -1
+        pos, neg = indices[:d_pos], indices[d_pos:d_sum]
+
+        if dense:
+            coeffs = [ 0 ] * N
+            for idx in pos: coeffs[idx] = 1
+            for idx in neg: coeffs[idx] = -1
+            polys.append(coeffs)
+        else:
+            polys.append((pos, neg))
+
+    return polys
+
+def ntru_random_message_batch(N: int, p: int, k: int, randbytes: RandBytes) -> list[list[int]]:
+    """Generate `k` random messages with coefficients in [-p//2 : p//2] from one random buffer"""
+
+    span = 2 * (p // 2) + 1
+    if span > 256:
+        raise ValueError("Bulk message sampler supports p up to 255.")
+
+    # Bytes at or above `limit` would bias the result, translate() drops them
+    # and maps the accepted ones to the value in [0 : span) in a single pass
+    limit = 256 - 256 % span
+    table = bytes(b % span for b in range(256))
+    rejected = bytes(range(limit, 256))
+
+    n_total = k * N
+    values = b''
+    while len(values) < n_total:
+        n_missing = n_total - len(values)
+        # Expected acceptance rate is limit / 256, add some margin on top
+        buffer = randbytes(n_missing * 256 // limit + 16)
+        values += buffer.translate(table, rejected)
+
+    shift = p // 2
+    centered = [ v - shift for v in values[:n_total] ]
+
+    messages = []
+    for i in range(k):
+        m = centered[i * N : (i + 1) * N]
+        # Same form as `ntru_random_message`: without padding zeros
+        while m and m[-1] == 0:
+            m.pop()
+        messages.append(m)
+
+    return messages
@@ -0,0 +1,52 @@
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+import atexit
+import sys
+
+def shm_create(size: int) -> SharedMemory:
+    """Create new shared memory block of `size` bytes owned by the current process"""
+    return SharedMemory(create=True, size=size)
+
+def shm_attach(name: str) -> SharedMemory:
+    """Attach to existing shared memory block without taking its ownership"""
+
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+
+    # Before Python 3.13 every attach registers the block in the resource tracker,
+    # which then unlinks it as soon as the attaching (worker) process exits
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+class ShmRegistry:
+    """Objects attached in the current process, keyed by the name of their shared memory block.
+
+    Every task carries only the name of the block, so worker attaches to it once. Objects must
+    have `close()`, which also removes them from the registry, remaining ones are closed at exit
+    as views into shared memory have to be released before interpreter teardown.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        atexit.register(self.close_all)
+
+    def attach(self, name: str, factory: Callable[[SharedMemory], object]):
+        """Return object attached to block `name`, create it with `factory(shm)` on first use"""
+        if name not in self._objects:
+            self._objects[name] = factory(shm_attach(name))
+        return self._objects[name]
+
+    def discard(self, name: str):
+        self._objects.pop(name, None)
+
+    def close_all(self):
+        for obj in list(self._objects.values()):
+            obj.close()
+
+    def __len__(self) -> int:
+        return len(self._objects)
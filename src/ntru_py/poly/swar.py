@@ -0,0 +1,119 @@
+from array import array
+from functools import lru_cache
+import sys
+
+from .core import poly_mod_kernel
+
+# Packed-lane (SWAR) arithmetic modulo m
+#
+# All N coefficients of a polynomial are stored in one Python integer, coefficient `i`
+# in bits [iW, (i + 1)W). Lanes hold canonical residues in [0, m) and W (8, 16, 32 or 64 bits)
+# leaves at least two guard bits above m, so a sum of two lanes and the compare trick
+# below never carry into the neighbouring lane. Every elementwise operation is then
+# a few operations on whole integers, conversions to and from lists go through `array`.
+#
+# Compare trick: for lanes x < 2^(W-1) and threshold t <= 2^(W-1), adding 2^(W-1) - t
+# to every lane sets the top bit of the lane exactly when x >= t.
+#
+# e.g. N = 3, m = 32 (W = 8): [1, 31, 5] is stored as 0x051f01
+
+class SwarLayout:
+    """Constants of the packed representation of N coefficients modulo `m`"""
+
+    def __init__(self, N: int, m: int):
+        for W in (8, 16, 32, 64):
+            if 4 * m <= 1 << W:
+                break
+        else:
+            raise ValueError("Packed lanes support moduli up to 2^62.")
+
+        self.N, self.m, self.W = N, m, W
+        self.size = W // 8
+        self.unsigned = { 8: "B", 16: "H", 32: "I", 64: "Q" }[W]
+        self.signed = self.unsigned.lower()
+
+        # Integer with value `v` in every lane is v * ones
+        self.ones = ((1 << (W * N)) - 1) // ((1 << W) - 1)
+        self.lane_m = self.ones * m
+        self.pow2 = m & (m - 1) == 0
+        self.mask = self.ones * (m - 1)
+
+        # Sign extension of signed bytes into the remaining bytes of the lane
+        self.sign_table = bytes.maketrans(bytes(range(256)), bytes(0xFF if x >= 0x80 else 0 for x in range(256)))
+
+@lru_cache(maxsize=None)
+def swar_layout(N: int, m: int) -> SwarLayout:
+    return SwarLayout(N, m)
+
+def _swar_ge(x: int, t: int, layout: SwarLayout) -> int:
+    """Return integer with 1 in every lane of `x` which is >= t and 0 elsewhere"""
+    W = layout.W
+    return ((x + layout.ones * ((1 << (W - 1)) - t)) >> (W - 1)) & layout.ones
+
+def _swar_from_bytes(data: bytes) -> int:
+    return int.from_bytes(data, 'little')
+
+def _swar_lanes(values, fmt: str) -> bytes:
+    lanes = array(fmt, values)
+    if sys.byteorder == 'big':
+        lanes.byteswap()
+    return lanes.tobytes()
+
+def swar_pack(a: list[int], layout: SwarLayout) -> int:
+    """Pack polynomial with at most N coefficients, reducing them modulo m"""
+    N, m = layout.N, layout.m
+    if len(a) > N:
+        raise ValueError(f"Polynomial has more than N = {N} coefficients")
+    a = list(a) + [ 0 ] * (N - len(a))
+
+    try:
+        # Conversion to signed bytes fails unless all coefficients are small (e.g. ternary messages),
+        # for m > 128 every such coefficient is already reduced, up to its sign
+        low = _swar_lanes(a, "b") if m > 128 else None
+    except OverflowError:
+        low = None
+
+    if low is not None:
+        # Small coefficients are sign-extended to the full lane with
+        # byte-level operations, lane then holds x mod 2^W
+        lanes = bytearray(N * layout.size)
+        lanes[0::layout.size] = low
+        high = low.translate(layout.sign_table)
+        for i in range(1, layout.size):
+            lanes[i::layout.size] = high
+        x = _swar_from_bytes(lanes)
+
+        # Negative lanes 2^W + v are mapped to m + v, no lane borrows as 2^W + v >= 2^W - m
+        negative = (x >> (layout.W - 1)) & layout.ones
+        return x - negative * ((1 << layout.W) - m)
+
+    return _swar_from_bytes(_swar_lanes(poly_mod_kernel(m)[0](a), layout.unsigned))
+
+def swar_unpack(x: int, layout: SwarLayout, centered: bool = False) -> list[int]:
+    """Unpack N coefficients in [0, m) or centered in [-m//2, m//2)"""
+    if centered:
+        # Lanes x >= m - m//2 are replaced by x - m in two's complement of the lane
+        m, W = layout.m, layout.W
+        x += _swar_ge(x, m - m // 2, layout) * ((1 << W) - m)
+
+    lanes = array(layout.signed if centered else layout.unsigned, x.to_bytes(layout.N * layout.size, 'little'))
+    if sys.byteorder == 'big':
+        lanes.byteswap()
+    return lanes.tolist()
+
+def swar_reduce(x: int, layout: SwarLayout) -> int:
+    """Reduce lanes in [0, 2m) into [0, m)"""
+    if layout.pow2:
+        return x & layout.mask
+    return x - _swar_ge(x, layout.m, layout) * layout.m
+
+def swar_add(a: int, b: int, layout: SwarLayout) -> int:
+    return swar_reduce(a + b, layout)
+
+def swar_neg(a: int, layout: SwarLayout) -> int:
+    # Lanes m - x are in (0, m], m itself is reduced to 0
+    return swar_reduce(layout.lane_m - a, layout)
+
+def swar_sub(a: int, b: int, layout: SwarLayout) -> int:
+    # Every lane of m - b is at least 0, so the subtraction never borrows
+    return swar_reduce(a + (layout.lane_m - b), layout)
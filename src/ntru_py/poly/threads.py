@@ -0,0 +1,100 @@
+from ntru_py.ntc.ntc import PolyCoeffs
+
+from .core import ntru_keygen_batch, ntru_encrypt, ntru_decrypt_batch, ntru_private_fp
+from .sampler import RandBytes, shake_drbg
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import threading
+
+# Thread-parallel execution
+#
+# Functions in core take an explicit source of random bytes, so threads never touch the global
+# state of the `random` module. Every task of the executor gets its own stream: derived from
+# the seed and the index of the task (reproducible regardless of scheduling), or from the
+# per-thread stream seeded by the OS when no seed is given.
+
+def ntru_free_threaded() -> bool:
+    """Check whether interpreter runs without the GIL, so threads can run Python code in parallel"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+_thread_streams = threading.local()
+
+def ntru_thread_randbytes() -> RandBytes:
+    """Return source of random bytes owned by the calling thread"""
+    if not hasattr(_thread_streams, "randbytes"):
+        _thread_streams.randbytes = shake_drbg(os.urandom(32))
+    return _thread_streams.randbytes
+
+def ntru_task_randbytes(seed: bytes, index: int) -> RandBytes:
+    """Return independent source of random bytes for the `index`-th task of seeded batch"""
+    return shake_drbg(seed + b"/task/" + index.to_bytes(8, 'little'))
+
+class NtruThreadExecutor:
+    """Batch keygen, encryption and decryption on a pool of threads.
+
+    On free-threaded builds the pool has one thread per CPU by default. With the GIL threads
+    cannot speed up pure Python arithmetic, so the default is a single worker.
+    """
+
+    def __init__(self, max_workers: int | None = None, seed: bytes | None = None, chunk_size: int = 16):
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) if ntru_free_threaded() else 1
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._seed = seed
+        self._n_tasks = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="ntru-worker")
+
+    def _randbytes(self) -> RandBytes:
+        # Seeded streams are assigned in the order of submission, not execution
+        if self._seed is None:
+            return None
+        with self._lock:
+            index = self._n_tasks
+            self._n_tasks += 1
+        return ntru_task_randbytes(self._seed, index)
+
+    def _run(self, fn, items: list, *args) -> list:
+        chunks = [ items[i : i + self.chunk_size] for i in range(0, len(items), self.chunk_size) ]
+        futures = [ self._pool.submit(fn, chunk, self._randbytes(), *args) for chunk in chunks ]
+        return [ result for future in futures for result in future.result() ]
+
+    @staticmethod
+    def _keygen_chunk(chunk: list, randbytes: RandBytes | None, N: int, p: int, q: int, d: int, fast_fp: bool) -> list:
+        randbytes = randbytes or ntru_thread_randbytes()
+        return ntru_keygen_batch(N, p, q, d, len(chunk), randbytes=randbytes, fast_fp=fast_fp)
+
+    @staticmethod
+    def _encrypt_chunk(chunk: list, randbytes: RandBytes | None, N: int, q: int, d: int, h: PolyCoeffs) -> list:
+        randbytes = randbytes or ntru_thread_randbytes()
+        return [ ntru_encrypt(N, q, d, m, h, randbytes) for m in chunk ]
+
+    @staticmethod
+    def _decrypt_chunk(chunk: list, randbytes: RandBytes | None, N: int, p: int, q: int, f: PolyCoeffs, fp: PolyCoeffs) -> list:
+        return ntru_decrypt_batch(N, p, q, chunk, f, fp)
+
+    def keygen(self, N: int, p: int, q: int, d: int, k: int, fast_fp: bool = False) -> list[tuple[PolyCoeffs, PolyCoeffs]]:
+        """Generate `k` pairs `(h, f)`"""
+        return self._run(self._keygen_chunk, [ None ] * k, N, p, q, d, fast_fp)
+
+    def encrypt(self, N: int, q: int, d: int, messages: list[PolyCoeffs], h: PolyCoeffs) -> list[PolyCoeffs]:
+        return self._run(self._encrypt_chunk, list(messages), N, q, d, h)
+
+    def decrypt(self, N: int, p: int, q: int, ciphertexts: list[PolyCoeffs], f: PolyCoeffs, fp: PolyCoeffs | None = None) -> list[PolyCoeffs]:
+        if fp is None:
+            # Derive fp once instead of in every task
+            fp = ntru_private_fp(f, N, p)
+        return self._run(self._decrypt_chunk, list(ciphertexts), N, p, q, f, fp)
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
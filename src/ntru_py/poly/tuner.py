@@ -0,0 +1,73 @@
+from ntru_py.ntc.ntc import NTRU_PARAMS
+
+from .core import POLY_CONV_STRATEGIES, POLY_DENSITY_CLASSES, POLY_SPARSE_DENSITY, poly_circ_conv_exact, poly_profile_path, poly_set_profile
+
+from pathlib import Path
+import json
+import random
+import time
+
+# Every strategy is measured for at least this time (in seconds) per operand class
+TUNE_MIN_TIME = 0.05
+
+def _tune_operands(N: int, q: int, density_class: str, rng: random.Random) -> tuple[list[int], list[int]]:
+    # Sparse class is represented by ternary polynomial with as many nonzero coefficients as
+    # classified sparse by `poly_circ_conv_exact`, dense class by a message-like ternary
+    # polynomial, the other operand is reduced modulo q
+    if density_class == "sparse":
+        n_nonzero = max(1, int(POLY_SPARSE_DENSITY * N))
+        a = [ 0 ] * N
+        for i, idx in enumerate(rng.sample(range(N), n_nonzero)):
+            a[idx] = 1 if i % 2 == 0 else -1
+    else:
+        a = [ rng.randint(-1, 1) for _ in range(N) ]
+    b = [ rng.randrange(q) for _ in range(N) ]
+    return a, b
+
+def _time_strategy(a: list[int], b: list[int], N: int, strategy: str, min_time: float) -> float:
+    """Return average time of a single convolution"""
+    n_runs = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < min_time or n_runs == 0:
+        poly_circ_conv_exact(a, b, N, strategy)
+        n_runs += 1
+    return elapsed / n_runs
+
+def poly_tune(params: dict | None = None, min_time: float = TUNE_MIN_TIME, seed: int = 0) -> tuple[dict, dict]:
+    """Measure available multiplication strategies for every NTRU params set and density class.
+
+    Return `(profile, timings)`, where `timings[(N, density_class)][strategy]` is time of one convolution in seconds.
+    """
+
+    params = params or NTRU_PARAMS
+    rng = random.Random(seed)
+    strategies = { density_class: [] for density_class in POLY_DENSITY_CLASSES }
+    timings = {}
+
+    for ntru_params in sorted(params.values(), key=lambda x: x["N"]):
+        N, q = ntru_params["N"], ntru_params["q"]
+
+        for density_class in POLY_DENSITY_CLASSES:
+            a, b = _tune_operands(N, q, density_class, rng)
+
+            # All strategies must agree before any of them is selected
+            expected = poly_circ_conv_exact(a, b, N, "schoolbook")
+            for name in POLY_CONV_STRATEGIES:
+                if poly_circ_conv_exact(a, b, N, name) != expected:
+                    raise ValueError(f"Multiplication strategy '{name}' returned incorrect result for N = {N}")
+
+            times = { name: _time_strategy(a, b, N, name, min_time) for name in POLY_CONV_STRATEGIES }
+            timings[(N, density_class)] = times
+            strategies[density_class].append([N, min(times, key=times.get)])
+
+    profile = { "version": 1, "strategies": strategies }
+    return profile, timings
+
+def poly_store_profile(profile: dict, path: str | Path | None = None) -> Path:
+    """Store profile to `path` or `poly_profile_path()` and start using it in the current process"""
+    poly_set_profile(profile)
+
+    path = Path(path) if path is not None else poly_profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(profile))
+    return path
@@ -7,6 +7,7 @@
 # a number of `+1`, therefore polynomials will have 2d nonzero coefficients 
 
 from sage.all import ZZ, Integers, Integer, lift
+from functools import lru_cache
 import random
 
 # Polynomial Ring 
@@ -21,6 +22,23 @@ Rx = ZZ['x'];
 # Number of tries for finding polynomial f
 MAX_ITERS = 10_000
 
+# Rings are expensive to construct in Sage, so they are created once
+# per parameter set and shared between all calls
+@lru_cache(maxsize=None)
+def ntru_modulus(N: int):
+    """Return NTRU ring modulus X^N - 1"""
+    return x**N - 1
+
+@lru_cache(maxsize=None)
+def quotient_ring(N: int, m: int):
+    """Return quotient ring (Z/mZ)[X]/(X^N - 1)"""
+    return Rx.change_ring(Integers(m)).quotient(ntru_modulus(N))
+
+@lru_cache(maxsize=None)
+def _ones(n: int):
+    # Polynomial with all `n` coefficients equal to 1
+    return Rx([1] * n)
+
 def random_poly(N: int, d_pos: int, d_neg: int):
     assert (d_sum := d_pos + d_neg) <= N
     coeffs = [ 0 ] * N
@@ -50,46 +68,42 @@ def random_message(N: int):
 def convolve(f, g, N: int):
     """Calculte result of f * g over NTRU ring Z[X]/(X^N - 1)"""
     assert max(f.degree(), g.degree()) < N
-    return (f * g) % (x**N - 1)
+    return (f * g) % ntru_modulus(N)
 
 def center_modulo(f, q: int):
     """Return polynomial with coefficients centered modulo q: in [-q//2, q//2]"""
-    center_coeff = lambda x: (x + q//2) % q - q//2
-    coeffs = [ center_coeff(fc) for fc in f ]
-    return Rx(coeffs)
+    # (x + q//2) % q - q//2 applied to all coefficients at once
+    shift = (q // 2) * _ones(f.degree() + 1)
+    return positive_modulo(f + shift, q) - shift
 
 def positive_modulo(f, q: int):
     """Return coefficients of polynomial modulo q: in [0, q)"""
-    return Rx([ (fc % q + q) % q for fc in f ])
+    return f.change_ring(Integers(q)).change_ring(ZZ)
 
 def invert_modp(f, N: int, p: int):
     """Find fp^-1 such that f * fp^-1 = 1 and p is prime"""
-    T = Rx.change_ring(Integers(p)).quotient(x**N - 1)
+    T = quotient_ring(N, p)
     return Rx(lift(1 / T(f)))
 
 def invert_modq(f, N: int, q: int):
     """Find fp^-1 such that f * fp^-1 = 1 and q is a power of 2"""
     assert Integer(q).is_power_of(2)
-    g = invert_modp(f, N, 2)
-    while True:
-        gf = convolve(g, f, N)
-        r = positive_modulo(gf, q)
-        if r == 1: 
-            return g
-
-        # 2 - r is actually shortened version from:
-        #   g2 = g1 * (1 - 2 * [(f * g - 1) / 2]) = g1 * (2 - f * g1) = 2g1 - fg1^2
-        # which comes from the fact that:
-        #   f * g1 = 1 + 2r(x) 
-        # If we multiply the result by (1 - 2r(x)) we will obtain:
-        #   f * g1 * (1 - 2r(x)) = 1 + 4r(x)^2 
-        # Which gives 1 mod 4 (exactly what we want)
-        g2r = convolve(g, 2 - r, N)
-        g = positive_modulo(g2r, q)
-
-    assert convolve(f, g, N) == 1
-    return g
-    return None
+    q_exp = Integer(q).exact_log(2)
+
+    # Newton iteration done natively in (Z/qZ)[X]/(X^N - 1)
+    T = quotient_ring(N, q)
+    F = T(f)
+    g = T(invert_modp(f, N, 2))
+
+    # If f * g = 1 + 2^k r(x), then:
+    #   f * g * (2 - f * g) = (1 + 2^k r(x)) (1 - 2^k r(x)) = 1 - 2^2k r(x)^2
+    # so every step doubles the number of correct bits of the inverse
+    prec = 1
+    while prec < q_exp:
+        g = g * (2 - F * g)
+        prec *= 2
+
+    return Rx(lift(g))
 
 def gen_keypair(N: int, p: int, q: int, d: int) -> tuple:
     """Generate (pk, sk) given NTRU domain parameters"""
@@ -1,4 +1,4 @@
-from ntru_py.ntc.ntc import NtruTestCase, NTRU_PARAMS
+from ntru_py.ntc.ntc import NtruTestCase, NTRU_PARAMS, KEY_FORM_FAST_FP
 
 from .core import * 
 
@@ -51,15 +51,25 @@ def sage_validate_testcase(ntc: NtruTestCase) -> bool:
         raise ValueError("Mesage m has coefficients outside of range [-1 : 1]")
         return False
 
-    if not all(x in [-1, 0, 1] for x in f):
+    # Key in form f = 1 + pF is validated through its ternary part F
+    if ntc.key_form == KEY_FORM_FAST_FP:
+        secret = [ (x - int(i == 0)) // p for i, x in enumerate(ntc.f) ]
+        if [ p * x + int(i == 0) for i, x in enumerate(secret) ] != ntc.f:
+            raise ValueError("Secret key f is not in form 1 + pF")
+        d_pos_expected, d_neg_expected = d, d
+    else:
+        secret = ntc.f
+        d_pos_expected, d_neg_expected = d, d - 1
+
+    if not all(x in [-1, 0, 1] for x in secret):
         raise ValueError("Secret key f has coefficients outside of range [-1 : 1]")
 
     # 3. Test if private key has valid number of +1 and -1
-    d_pos = sum(int(x == 1) for x in ntc.f)
-    d_neg = sum(int(x == -1) for x in ntc.f)
+    d_pos = sum(int(x == 1) for x in secret)
+    d_neg = sum(int(x == -1) for x in secret)
     # d_zero = sum(int(c == 0) for c in ntc.f)
     # cnt_zero = d_zero == (N - 2 * d + 1)
-    if not (d_pos == d and d_neg == d - 1):
+    if not (d_pos == d_pos_expected and d_neg == d_neg_expected):
         raise ValueError("Wrong number of +1, -1 in polynomial f")
         return False
 
@@ -1,7 +1,34 @@
 import unittest
+import tempfile
+import io
+import os
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
+from ntru_py.ntc.ntc import NTRU_PARAMS, KEY_FORM_FAST_FP, ntc_write_jsonl, ntc_read_jsonl
+
+import ntru_py.poly.batch
+import ntru_py.poly.tuner
 from ntru_py.poly.core import *
-from ntru_py.poly.ntc_api import poly_validate_testcase
+from ntru_py.poly.sampler import *
+from ntru_py.poly.gf3 import *
+from ntru_py.poly.keyring import *
+from ntru_py.poly.batch import *
+from ntru_py.poly.encryptor import *
+from ntru_py.poly.tuner import *
+from ntru_py.poly.threads import *
+from ntru_py.poly.kem import *
+from ntru_py.poly.swar import *
+from ntru_py.poly.packing import *
+from ntru_py.poly.ntc_api import *
+
+def _keyring_decrypt(args):
+    keyring, fingerprint, c = args
+    return keyring.decrypt(fingerprint, c)
+
+def _attached_batches_count():
+    return len(ntru_py.poly.batch._attached_batches)
 
 class TestPoly(unittest.TestCase):
 
@@ -109,3 +136,641 @@ class TestPoly(unittest.TestCase):
 
         my_m = ntru_decrypt(N, p, q, c, f)
         self.assertEqual(my_m, m)
+
+    def test_random_poly_batch(self):
+        N, d = 97, 5
+
+        randbytes = shake_drbg(b"test_random_poly_batch")
+        polys = ntru_random_poly_batch(N, d, d - 1, 20, randbytes)
+        for f in polys:
+            self.assertEqual(len(f), N)
+            self.assertEqual(f.count(1), d)
+            self.assertEqual(f.count(-1), d - 1)
+
+        # Index form describes the same polynomials for the same seed
+        randbytes = shake_drbg(b"test_random_poly_batch")
+        indices = ntru_random_poly_batch(N, d, d - 1, 20, randbytes, dense=False)
+        for f, (pos, neg) in zip(polys, indices):
+            self.assertEqual(sorted(pos), [ i for i in range(N) if f[i] == 1 ])
+            self.assertEqual(sorted(neg), [ i for i in range(N) if f[i] == -1 ])
+
+        # Messages have coefficients in [-p//2 : p//2] and no padding zeros
+        messages = ntru_random_message_batch(N, 3, 20, shake_drbg(b"messages"))
+        for m in messages:
+            self.assertTrue(len(m) <= N)
+            self.assertTrue(all(x in [-1, 0, 1] for x in m))
+            self.assertEqual(m, poly_truncate_zeros(m))
+
+        # Seeded source of randomness makes the whole NTRU pipeline reproducible
+        h1, f1 = ntru_keygen(N, 3, 512, d, randbytes=shake_drbg(b"keygen"))
+        h2, f2 = ntru_keygen(N, 3, 512, d, randbytes=shake_drbg(b"keygen"))
+        self.assertEqual((h1, f1), (h2, f2))
+
+        randbytes = shake_drbg(b"encrypt")
+        m = ntru_random_message(N, 3, randbytes)
+        c = ntru_encrypt(N, 512, d, m, h1, randbytes)
+        self.assertEqual(ntru_decrypt(N, 3, 512, c, f1), m)
+
+    def test_verify_levels(self):
+        N, p, q = 11, 3, 32
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        f = [-1, 1, 1, 0, -1, 0, 1, 0, 0, 1, -1]
+
+        for level in VERIFY_LEVELS:
+            fp = poly_inv_modprime(f, M, p, verify=level)
+            fq = poly_inv_modexp(f, M, 2, 5, verify=level)
+            self.assertTrue(poly_verify_inverse(f, fp, M, p, VERIFY_FULL))
+            self.assertTrue(poly_verify_inverse(f, fq, M, q, VERIFY_FULL))
+
+        # Wrong inverse is rejected on both cheap and full level
+        wrong_fp = [ (x + 1) % p for x in fp ]
+        self.assertFalse(poly_verify_inverse(f, wrong_fp, M, p, VERIFY_CHEAP))
+        self.assertFalse(poly_verify_inverse(f, wrong_fp, M, p, VERIFY_FULL))
+        self.assertTrue(poly_verify_inverse(f, wrong_fp, M, p, VERIFY_OFF))
+
+        # Global level is used when no level is given per call
+        default_level = poly_get_verify_level()
+        try:
+            poly_set_verify_level(VERIFY_OFF)
+            self.assertTrue(poly_verify_inverse(f, wrong_fp, M, p))
+        finally:
+            poly_set_verify_level(default_level)
+
+        with self.assertRaises(ValueError):
+            poly_set_verify_level("paranoid")
+
+    def test_keyring(self):
+        N, p, q, d = 97, 3, 512, 5
+        ntru_tuple = (N, p, q, d)
+
+        randbytes = shake_drbg(b"test_keyring")
+        keys = [ ntru_keygen(N, p, q, d, randbytes=randbytes) for _ in range(3) ]
+
+        with NtruKeyring.create((ntru_tuple, f) for _, f in keys) as keyring:
+            self.assertEqual(len(keyring), 3)
+
+            jobs = []
+            for h, f in keys:
+                fingerprint = ntru_key_fingerprint(ntru_tuple, f)
+                self.assertIn(fingerprint, keyring)
+
+                m = ntru_random_message(N, p, randbytes)
+                c = ntru_encrypt(N, q, d, m, h, randbytes)
+                self.assertEqual(keyring.decrypt(fingerprint, c), m)
+                jobs.append((fingerprint, c, m))
+
+            # Views are read-only
+            _, f, _ = keyring.get(jobs[0][0])
+            with self.assertRaises(TypeError):
+                f[0] = 0
+
+            # Workers receive only the name of the shared memory block
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                results = pool.map(_keyring_decrypt, [ (keyring, fp, c) for fp, c, _ in jobs ])
+                self.assertEqual(list(results), [ m for _, _, m in jobs ])
+
+        # Key in form f = 1 + pF is decrypted with a single convolution, as without the keyring
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes, fast_fp=True)
+        fingerprint = ntru_key_fingerprint(ntru_tuple, f)
+        m = ntru_random_message(N, p, randbytes)
+        c = ntru_encrypt(N, q, d, m, h, randbytes)
+        with NtruKeyring.create([ (ntru_tuple, f) ]) as keyring:
+            conv = ntru_py.poly.core.poly_circ_conv_center_mod
+            with mock.patch("ntru_py.poly.core.poly_circ_conv_center_mod", wraps=conv) as counted:
+                self.assertEqual(keyring.decrypt(fingerprint, c), m)
+            self.assertEqual(counted.call_count, 1)
+
+    def test_shared_batch(self):
+        N, p, q, d = 97, 3, 512, 5
+        randbytes = shake_drbg(b"test_shared_batch")
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes)
+        messages = ntru_random_message_batch(N, p, 10, randbytes)
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            with NtruSharedBatch.from_polys(messages, N) as encrypt_batch:
+                self.assertEqual(ntru_encrypt_shared(pool, encrypt_batch, q, d, h, chunk_rows=3), 10)
+                ciphertexts = encrypt_batch.outputs()
+
+            with NtruSharedBatch.from_polys(ciphertexts, N) as decrypt_batch:
+                self.assertEqual(ntru_decrypt_shared(pool, decrypt_batch, p, q, f, chunk_rows=3), 10)
+                self.assertEqual(decrypt_batch.outputs(), messages)
+
+        # Long-lived worker does not keep any of the processed batches attached
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            for _ in range(5):
+                with NtruSharedBatch.from_polys(messages, N) as encrypt_batch:
+                    ntru_encrypt_shared(pool, encrypt_batch, q, d, h, chunk_rows=4)
+                    with NtruSharedBatch.from_polys(encrypt_batch.outputs(), N) as decrypt_batch:
+                        ntru_decrypt_shared(pool, decrypt_batch, p, q, f, chunk_rows=4)
+                        self.assertEqual(decrypt_batch.outputs(), messages)
+            self.assertEqual(pool.submit(_attached_batches_count).result(), 0)
+
+    def test_poly_xgcd_fast(self):
+        rng = random.Random(31)
+
+        for m in [2, 3, 7]:
+            for _ in range(100):
+                a = poly_truncate_zeros([ rng.randrange(m) for _ in range(rng.randint(1, 80)) ])
+                b = poly_truncate_zeros([ rng.randrange(m) for _ in range(rng.randint(1, 80)) ])
+
+                # Half-GCD follows the same sequence of quotients as the textbook algorithm
+                d, s, t = poly_xgcd(a, b, m)
+                self.assertEqual(poly_xgcd_fast(a, b, m), (d, s, t))
+                self.assertEqual(poly_xgcd_bezout(a, b, m), (d, s))
+
+        # Bezout coefficient is the inverse in the NTRU ring
+        N, p = 97, 3
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        f = poly_truncate_zeros(ntru_random_poly(N, 5, 4, shake_drbg(b"test_poly_xgcd_fast")))
+        d, fp = poly_xgcd_bezout(f, M, p)
+        self.assertEqual(d, POLY_1)
+        self.assertEqual(fp, poly_inv_modprime(f, M, p))
+
+    def test_gf3_bitsliced(self):
+        rng = random.Random(32)
+        N = 97
+
+        a = [ rng.randint(-5, 5) for _ in range(N) ]
+        b = [ rng.randint(-5, 5) for _ in range(N) ]
+        a3, b3 = gf3_from_poly(a), gf3_from_poly(b)
+
+        # Elementwise operations agree with the generic ones
+        self.assertEqual(gf3_to_poly(a3, N), poly_cast_mod(a, 3))
+        self.assertEqual(gf3_to_poly(gf3_add(a3, b3), N), poly_add_mod(a, b, 3))
+        self.assertEqual(gf3_to_poly(gf3_sub(a3, b3), N), poly_sub_mod(a, b, 3))
+        self.assertEqual(gf3_to_poly(gf3_neg(a3), N), poly_neg_mod(a, 3))
+        self.assertEqual(gf3_to_poly(gf3_mul_scalar(a3, 2), N), poly_mul_scalar_mod(a, 2, 3))
+
+        # Multiplication by X^k is a rotation of coefficients
+        self.assertEqual(gf3_to_poly(gf3_rotate(a3, 5, N), N), [ x % 3 for x in a[-5:] + a[:-5] ])
+
+        # Convolution agrees with the schoolbook one
+        c = [ 0 ] * N
+        for i, x in enumerate(a):
+            for j, y in enumerate(b):
+                c[(i + j) % N] += x * y
+        self.assertEqual(gf3_to_poly(gf3_circ_conv(a3, b3, N), N), poly_cast_mod(c, 3))
+
+        # Inversion agrees with the textbook extended euclidean algorithm
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        f = poly_truncate_zeros(ntru_random_poly(N, 5, 4, shake_drbg(b"test_gf3_bitsliced")))
+        _, fp, _ = poly_xgcd(f, M, 3)
+        self.assertEqual(gf3_to_poly(gf3_inv(gf3_from_poly(f), gf3_from_poly(M))), fp)
+
+        with self.assertRaises(ValueError):
+            gf3_inv(gf3_from_poly([1, 1]), gf3_from_poly([2, 0, 1]))
+
+    def test_fast_fp_key_form(self):
+        N, p, q, d = 97, 3, 512, 5
+        randbytes = shake_drbg(b"test_fast_fp_key_form")
+
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes, fast_fp=True)
+        self.assertTrue(ntru_is_fast_fp_key(f, p))
+
+        # f = 1 + pF, where F has d coeffs = +1 and d coeffs = -1
+        F = [ (x - int(i == 0)) // p for i, x in enumerate(f) ]
+        self.assertEqual((F.count(1), F.count(-1)), (d, d))
+
+        # With q = 32 coefficients of p(gr + Fm) + m do not always fit into (-q/2, q/2)
+        self.assertTrue(ntru_fast_fp_supported(p, q, d))
+        self.assertFalse(ntru_fast_fp_supported(3, 32, 2))
+        with self.assertRaises(ValueError):
+            ntru_keygen(11, 3, 32, 2, randbytes=randbytes, fast_fp=True)
+        with self.assertRaises(ValueError):
+            ntru_keygen_batch(11, 3, 32, 2, 2, randbytes=randbytes, fast_fp=True)
+
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        self.assertEqual(poly_inv_modprime(f, M, p), POLY_1)
+        self.assertEqual(ntru_private_fp(f, N, p), POLY_1)
+
+        # Ternary key is inverted
+        _, f_ternary = ntru_keygen(N, p, q, d, randbytes=randbytes)
+        self.assertEqual(ntru_private_fp(f_ternary, N, p), poly_inv_modprime(f_ternary, M, p))
+
+        for _ in range(10):
+            m = ntru_random_message(N, p, randbytes)
+            c = ntru_encrypt(N, q, d, m, h, randbytes)
+            self.assertEqual(ntru_decrypt(N, p, q, c, f), m)
+            self.assertEqual(ntru_decrypt(N, p, q, c, f, POLY_1), m)
+
+    def test_decrypt_batch(self):
+        N, p, q, d = 97, 3, 512, 5
+        randbytes = shake_drbg(b"test_decrypt_batch")
+
+        for fast_fp in [False, True]:
+            h, f = ntru_keygen(N, p, q, d, randbytes=randbytes, fast_fp=fast_fp)
+            messages = ntru_random_message_batch(N, p, 20, randbytes)
+            ciphertexts = [ ntru_encrypt(N, q, d, m, h, randbytes) for m in messages ]
+
+            self.assertEqual(ntru_decrypt_batch(N, p, q, ciphertexts, f), messages)
+            self.assertEqual(ntru_decrypt_batch(N, p, q, [], f), [])
+
+    def test_mod_kernels(self):
+        rng = random.Random(35)
+
+        # Values outside of the lookup tables fall back to generic reduction
+        a = [ rng.randint(-10 ** 6, 10 ** 6) for _ in range(200) ] + [ -1, 0, 1 ]
+
+        for m in [2, 3, 5, 7, 32, 2048, 4096, 1000]:
+            reduce, center = poly_mod_kernel(m)
+            self.assertEqual(reduce(a), [ x % m for x in a ])
+            self.assertEqual(center(a), [ (x + m // 2) % m - m // 2 for x in a ])
+
+            small = [ rng.randint(-3 * m, 3 * m) for _ in range(200) ]
+            self.assertEqual(reduce(small), [ x % m for x in small ])
+            self.assertEqual(center(small), [ (x + m // 2) % m - m // 2 for x in small ])
+
+    def test_invertibility_prefilter(self):
+        self.assertEqual(ntru_factor_degree(509, 2), 508)
+        self.assertEqual(ntru_factor_degree(97, 3), 48)
+
+        N, p = 11, 3
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        rng = random.Random(36)
+
+        for _ in range(300):
+            f = poly_truncate_zeros([ rng.randint(-1, 1) for _ in range(N) ])
+            if not f:
+                continue
+            for m in [2, 3]:
+                try:
+                    poly_inv_modprime(f, M, m, VERIFY_FULL)
+                    invertible = True
+                except ValueError:
+                    invertible = False
+                # Rejected candidates are never invertible
+                if not ntru_invertibility_prefilter(f, N, m):
+                    self.assertFalse(invertible)
+
+        # f(1) = 0 (divisible by X - 1) and constant multiples of Φ_N = 1 + X + ... + X^(N-1)
+        # are rejected, and really are not invertible
+        rejected = [
+            ([1, -1], 3),
+            (poly_truncate_zeros(ntru_random_poly(N, 3, 3)), 3),
+            (poly_truncate_zeros(ntru_random_poly(N, 4, 2)), 2),
+            ([1] * N, 2),
+            ([2] * N, 3),
+            ([-1] * N, 3),
+        ]
+        for f, m in rejected:
+            self.assertFalse(ntru_invertibility_prefilter(f, N, m))
+            with self.assertRaises(ValueError):
+                poly_inv_modprime(f, M, m, VERIFY_FULL)
+
+        # Filter is exact when Φ_N is irreducible, e.g. N = 509 modulo 2
+        N = 509
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        for _ in range(5):
+            f = poly_truncate_zeros(ntru_random_poly(N, 11, 10))
+            self.assertTrue(ntru_invertibility_prefilter(f, N, 2))
+            poly_inv_modprime(f, M, 2)
+
+            # Even number of nonzero coefficients, so f(1) = 0 modulo 2
+            f = poly_truncate_zeros(ntru_random_poly(N, 11, 11))
+            self.assertFalse(ntru_invertibility_prefilter(f, N, 2))
+            with self.assertRaises(ValueError):
+                poly_inv_modprime(f, M, 2)
+
+    def test_encryptor_pool(self):
+        N, p, q, d = 97, 3, 512, 5
+        randbytes = shake_drbg(b"test_encryptor_pool")
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes)
+
+        # Pool is filled synchronously, then emptied by encryptions and filled on demand
+        with NtruEncryptor(N, q, d, h, pool_size=4, randbytes=randbytes, start=False) as encryptor:
+            encryptor.fill()
+            self.assertEqual(encryptor.available, 4)
+            for _ in range(6):
+                m = ntru_random_message(N, p, randbytes)
+                self.assertEqual(ntru_decrypt(N, p, q, encryptor.encrypt(m), f), m)
+            self.assertEqual(encryptor.available, 0)
+
+        # Background refill
+        with NtruEncryptor(N, q, d, h, pool_size=8) as encryptor:
+            messages = [ ntru_random_message(N, p) for _ in range(20) ]
+            ciphertexts = [ encryptor.encrypt(m) for m in messages ]
+        self.assertEqual(encryptor.available, 0)
+        self.assertEqual(ntru_decrypt_batch(N, p, q, ciphertexts, f), messages)
+
+    def test_fused_kernels(self):
+        rng = random.Random(39)
+
+        def conv_reference(a, b, N, m):
+            c = [ 0 ] * N
+            for i, x in enumerate(a):
+                for j, y in enumerate(b):
+                    c[(i + j) % N] += x * y
+            return [ x % m for x in c ]
+
+        for N, m in [(11, 32), (11, 3), (97, 512), (97, 7)]:
+            for len_a, len_b in [(N, N), (N - 3, N), (2 * N + 1, N - 1)]:
+                a = [ rng.randint(-5, 5) for _ in range(len_a) ]
+                b = [ rng.randint(-1, 1) for _ in range(len_b) ]
+                c = [ rng.randint(-m, m) for _ in range(N - 1) ]
+
+                expected = conv_reference(a, b, N, m)
+                self.assertEqual(poly_circ_conv_mod(a, b, N, m), expected)
+                self.assertEqual(poly_circ_conv_exact(a, b, N), poly_circ_conv_exact(b, a, N))
+                self.assertEqual(poly_circ_conv_add_mod(a, b, c, N, m), poly_add_mod(expected, c, m))
+                self.assertEqual(poly_circ_conv_center_mod(a, b, N, m), poly_center_mod(expected, m))
+
+        N, p, q, d = 97, 3, 512, 5
+        randbytes = shake_drbg(b"test_fused_kernels")
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes)
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        fp = poly_inv_modprime(f, M, p)
+
+        for _ in range(10):
+            m = ntru_random_message(N, p, randbytes)
+            seed = bytes([ rng.randrange(256) for _ in range(16) ])
+            c = ntru_encrypt(N, q, d, m, h, shake_drbg(seed))
+            self.assertEqual(c, ntru_encrypt_unfused(N, q, d, m, h, shake_drbg(seed)))
+            self.assertEqual(ntru_decrypt(N, p, q, c, f, fp), ntru_decrypt_unfused(N, p, q, c, f, fp))
+            self.assertEqual(ntru_decrypt(N, p, q, c, f, fp), m)
+
+    def test_mul_strategies(self):
+        rng = random.Random(40)
+
+        for N in [1, 11, 97, 200]:
+            for density in [0.05, 0.5, 1.0]:
+                a = [ rng.randint(-2, 2) if rng.random() < density else 0 for _ in range(N) ]
+                b = [ rng.randrange(-2048, 2048) for _ in range(N + 3) ]
+                expected = poly_circ_conv_exact(a, b, N, "schoolbook")
+                for name in POLY_CONV_STRATEGIES:
+                    self.assertEqual(poly_circ_conv_exact(a, b, N, name), expected)
+
+        # Ordinary product goes through the same strategies
+        a = [ rng.randrange(512) for _ in range(40) ]
+        b = [ rng.randrange(512) for _ in range(70) ]
+        expected = [ 0 ] * 109
+        for i, x in enumerate(a):
+            for j, y in enumerate(b):
+                expected[i + j] += x * y
+        self.assertEqual(poly_mul_mod(a, b, 512), [ x % 512 for x in expected ])
+
+        # Profile selects strategy by N and density class, broken profile falls back to the defaults
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                profile, timings = poly_tune({ "tiny": NTRU_PARAMS["tiny"] }, min_time=0.001)
+                self.assertEqual(set(timings), { (11, "sparse"), (11, "dense") })
+
+                path = Path(tmp) / "profile.json"
+                poly_store_profile({ "version": 1, "strategies": { "sparse": [[0, "schoolbook"]], "dense": [[0, "rotation"], [64, "karatsuba"]] } }, path)
+                self.assertIs(poly_conv_strategy(11, "sparse"), POLY_CONV_STRATEGIES["schoolbook"])
+                self.assertIs(poly_conv_strategy(63, "dense"), POLY_CONV_STRATEGIES["rotation"])
+                self.assertIs(poly_conv_strategy(64, "dense"), POLY_CONV_STRATEGIES["karatsuba"])
+
+                poly_set_profile(None)
+                self.assertEqual(poly_load_profile(path)["strategies"]["sparse"], [[0, "schoolbook"]])
+
+                path.write_text("{ broken")
+                self.assertEqual(poly_load_profile(path), POLY_DEFAULT_PROFILE)
+
+                # Default location follows the home directory at the time of loading, not of import
+                with mock.patch.dict(os.environ, { "HOME": tmp }):
+                    os.environ.pop(POLY_PROFILE_ENV, None)
+                    self.assertEqual(poly_profile_path(), Path(tmp) / POLY_PROFILE_HOME_PATH)
+                with mock.patch.dict(os.environ, { POLY_PROFILE_ENV: str(path) }):
+                    self.assertEqual(poly_profile_path(), path)
+
+            # Operands measured as sparse are classified sparse by the convolution too
+            for N in [11, 97, 821]:
+                a, _ = ntru_py.poly.tuner._tune_operands(N, 2048, "sparse", random.Random(40))
+                self.assertLessEqual(N - a.count(0), POLY_SPARSE_DENSITY * N)
+        finally:
+            poly_set_profile(None)
+
+    def test_thread_executor(self):
+        N, p, q, d = 97, 3, 512, 5
+        self.assertIsInstance(ntru_free_threaded(), bool)
+
+        # Seeded results do not depend on the number of threads
+        with NtruThreadExecutor(1, seed=b"test_thread_executor", chunk_size=2) as executor:
+            keys = executor.keygen(N, p, q, d, 3)
+        with NtruThreadExecutor(4, seed=b"test_thread_executor", chunk_size=2) as executor:
+            self.assertEqual(executor.keygen(N, p, q, d, 3), keys)
+
+            h, f = keys[0]
+            messages = [ ntru_random_message(N, p, ntru_thread_randbytes()) for _ in range(40) ]
+            ciphertexts = executor.encrypt(N, q, d, messages, h)
+            self.assertEqual(executor.decrypt(N, p, q, ciphertexts, f), messages)
+
+        # Unseeded tasks use per-thread streams
+        with NtruThreadExecutor(4) as executor:
+            ciphertexts = executor.encrypt(N, q, d, messages, h)
+            self.assertEqual(len(set(map(tuple, ciphertexts))), len(messages))
+            self.assertEqual(executor.decrypt(N, p, q, ciphertexts, f), messages)
+
+    def test_kronecker(self):
+        rng = random.Random(42)
+
+        for len_a, len_b, bound in [(1, 1, 1), (5, 3, 1), (97, 97, 2048), (50, 200, 1 << 40), (30, 30, 1 << 70)]:
+            a = [ rng.randint(-bound, bound) for _ in range(len_a) ]
+            b = [ rng.randint(-bound, bound) for _ in range(len_b) ]
+            expected = [ 0 ] * (len_a + len_b - 1)
+            for i, x in enumerate(a):
+                for j, y in enumerate(b):
+                    expected[i + j] += x * y
+            self.assertEqual(poly_mul_kronecker(a, b), expected)
+
+        self.assertEqual(poly_mul_kronecker([], [1, 2]), [])
+        self.assertEqual(poly_mul_kronecker([0, 0], [-5, 0, 7]), [0, 0, 0, 0])
+
+        # Ring products modulo X^N - 1 avoid long division, but agree with it
+        N, q = 97, 512
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        a = [ rng.randrange(q) for _ in range(N) ]
+        b = [ rng.randint(-1, 1) for _ in range(N) ]
+        self.assertEqual(poly_mul_mod_mod(a, b, M, q), poly_div_mod(poly_mul_mod(a, b, q), M, q)[1])
+
+    def test_kem(self):
+        ntru_tuple = N, p, q, d = 97, 3, 512, 5
+        randbytes = shake_drbg(b"test_kem")
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes)
+
+        for size in [0, 1, 100, 1000]:
+            data = randbytes(size)
+            encrypted = ntru_kem_encrypt_bytes(ntru_tuple, h, data, chunk_size=64, randbytes=randbytes)
+            self.assertEqual(ntru_kem_decrypt_bytes(ntru_tuple, f, encrypted), data)
+
+        data = randbytes(300)
+        encrypted = ntru_kem_encrypt_bytes(ntru_tuple, h, data, chunk_size=64, randbytes=randbytes)
+        header_size = len(encrypted) - 5 * (5 + 32) - 300
+
+        # Modified ciphertext of the payload, truncated stream and missing final chunk are rejected
+        tampered = bytearray(encrypted); tampered[-40] ^= 1
+        chunk_record = 5 + 64 + 32
+        for corrupted in [bytes(tampered), encrypted[:-1], encrypted[:header_size + 4 * chunk_record], encrypted + b"\x00"]:
+            with self.assertRaises(ValueError):
+                ntru_kem_decrypt_bytes(ntru_tuple, f, corrupted)
+
+        # Different key or params
+        _, f_other = ntru_keygen(N, p, q, d, randbytes=randbytes)
+        with self.assertRaises(ValueError):
+            ntru_kem_decrypt_bytes(ntru_tuple, f_other, encrypted)
+        with self.assertRaises(ValueError):
+            ntru_kem_decrypt_bytes((11, 3, 32, 2), f, encrypted)
+
+    def test_swar(self):
+        rng = random.Random(45)
+
+        for N, m in [(11, 32), (97, 512), (821, 4096), (50, 3), (50, 1000), (30, 1 << 40)]:
+            layout = swar_layout(N, m)
+            for bound in [1, m, 10 ** 6]:
+                a = [ rng.randint(-bound, bound) for _ in range(N) ]
+                b = [ rng.randint(-bound, bound) for _ in range(N - 2) ]
+                a_red, b_red = poly_cast_mod(a, m), poly_cast_mod(b + [ 0, 0 ], m)
+
+                x, y = swar_pack(a, layout), swar_pack(b, layout)
+                self.assertEqual(swar_unpack(x, layout), a_red)
+                self.assertEqual(swar_unpack(x, layout, centered=True), poly_center_mod(a_red, m))
+                self.assertEqual(swar_unpack(swar_add(x, y, layout), layout), poly_add_mod(a_red, b_red, m))
+                self.assertEqual(swar_unpack(swar_sub(x, y, layout), layout), poly_sub_mod(a_red, b_red, m))
+                self.assertEqual(swar_unpack(swar_neg(x, layout), layout), poly_neg_mod(a_red, m))
+
+        with self.assertRaises(ValueError):
+            swar_pack([ 1 ] * 12, swar_layout(11, 32))
+
+    def test_validate_modes(self):
+        N, p, q, d = 97, 3, 512, 5
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        randbytes = shake_drbg(b"test_validate_modes")
+
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes)
+        m = ntru_random_message(N, p, randbytes)
+        r = ntru_random_poly(N, d, d, randbytes)
+        c = poly_truncate_zeros(poly_add_mod(poly_mul_mod_mod(h, r, M, q), m, q))
+        fp, fq = poly_inv_modprime(f, M, p), poly_inv_modexp(f, M, 2, 9)
+        ntc = NtruTestCase(N, p, q, d, h, f, m, c, fp, fq, r, [])
+
+        for mode in NTC_VALIDATE_MODES:
+            self.assertTrue(poly_validate_testcase(ntc, mode))
+
+        # Wrong or non-canonical inverses are rejected in every mode
+        for wrong_fp in [ [ (x + 1) % p for x in fp ], [ x - p for x in fp ], fp + [ 0 ] ]:
+            for mode in NTC_VALIDATE_MODES:
+                with self.assertRaises(ValueError):
+                    poly_validate_testcase(NtruTestCase(N, p, q, d, h, f, m, c, wrong_fp, fq, r, []), mode)
+
+        with self.assertRaises(ValueError):
+            poly_validate_testcase(NtruTestCase(N, p, q, d, h, f, m, c, fp, [ x + q for x in fq ], r, []))
+        with self.assertRaises(ValueError):
+            poly_validate_testcase(ntc, "paranoid")
+
+    def test_inv_frobenius(self):
+        rng = random.Random(47)
+
+        # Prime and composite N, with one or more irreducible factors of X^N - 1
+        for N, p in [(11, 2), (11, 3), (97, 2), (97, 5), (12, 5), (15, 2), (509, 2)]:
+            M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+            for _ in range(5):
+                # Operand longer than N is reduced modulo X^N - 1 first
+                a = [ rng.randrange(-p, p) for _ in range(N + 3) ]
+                a_red = poly_truncate_zeros(poly_cast_mod(poly_circ_fold(a, N), p))
+                d, a_inv, _ = poly_xgcd(a_red, M, p)
+                if d == POLY_1:
+                    self.assertEqual(poly_inv_frobenius(a, N, p), a_inv)
+                else:
+                    with self.assertRaises(ValueError):
+                        poly_inv_frobenius(a, N, p)
+
+            # Frobenius map is the p-th power
+            a = [ rng.randrange(p) for _ in range(N) ]
+            a_p = POLY_1
+            for _ in range(p):
+                a_p = poly_circ_conv_mod(a_p, a, N, p)
+            self.assertEqual(poly_frobenius(a, N, p), a_p)
+
+        # f(1) = 0, so f is divisible by X - 1
+        with self.assertRaises(ValueError):
+            poly_inv_frobenius([ 1, 1 ], 11, 2)
+        with self.assertRaises(ValueError):
+            poly_inv_modprime([ 1, 1 ], [ -1 ] + [ 0 ] * 10 + [ 1 ], 2)
+
+        # Order of p modulo N does not exist
+        for N, p in [(12, 2), (10, 5), (1, 3), (0, 3)]:
+            with self.assertRaises(ValueError):
+                ntru_factor_degree(N, p)
+        with self.assertRaises(ValueError):
+            poly_inv_frobenius([ 1, 1, 1 ], 10, 5)
+
+    def test_message_packing(self):
+        rng = random.Random(48)
+
+        for N, p in [(11, 3), (97, 3), (821, 3), (97, 2), (97, 5)]:
+            capacity = ntru_pack_capacity(N, p)
+            self.assertLessEqual(256 ** capacity, p ** N)
+
+            # Payload filling the whole message, including trailing zero bytes,
+            # count and length take 1 byte each, lengths above 127 take 2 bytes
+            full = capacity - 2 if capacity - 2 < 128 else capacity - 3
+            for data in [ b"", bytes(full), bytes([ 0xFF ]) * full ]:
+                m = ntru_pack_message([ data ], N, p)
+                self.assertLessEqual(len(m), N)
+                self.assertTrue(all(-p // 2 <= x <= p // 2 for x in m))
+                self.assertEqual(ntru_unpack_message(m, N, p), [ data ])
+
+            payloads = [ rng.randbytes(rng.randrange(min(capacity - 2, 100) or 1)) for _ in range(50) ]
+            messages = ntru_pack_messages(payloads, N, p)
+            self.assertEqual([ data for m in messages for data in ntru_unpack_message(m, N, p) ], payloads)
+
+            with self.assertRaises(ValueError):
+                ntru_pack_message([ bytes(capacity) ], N, p)
+
+        # Round trip through encryption amortizes one ciphertext over many payloads
+        N, p, q, d = ntru_tuple = (97, 3, 512, 5)
+        randbytes = shake_drbg(b"test_message_packing")
+        h, f = ntru_keygen(N, p, q, d, randbytes=randbytes)
+        payloads = [ rng.randbytes(rng.randrange(4)) for _ in range(40) ]
+        ciphertexts = ntru_encrypt_payloads(ntru_tuple, payloads, h, randbytes)
+        self.assertLess(len(ciphertexts), len(payloads) // 4)
+        self.assertEqual(ntru_decrypt_payloads(ntru_tuple, ciphertexts, f), payloads)
+
+    def test_generate_testcase(self):
+        # Extended keygen returns the same keys as `ntru_keygen` for the same random stream
+        h, f, fp, fq, g = ntru_keygen_ext(97, 3, 512, 5, randbytes=shake_drbg(b"keygen_ext"))
+        self.assertEqual(ntru_keygen(97, 3, 512, 5, randbytes=shake_drbg(b"keygen_ext")), (h, f))
+
+        corpus = list(poly_generate_corpus(["tiny", "small"], 4, seed=b"corpus"))
+        corpus += list(poly_generate_corpus(["small"], 10, seed=b"corpus", key_form=KEY_FORM_FAST_FP))
+        for ntc in corpus:
+            for mode in NTC_VALIDATE_MODES:
+                self.assertTrue(poly_validate_testcase(ntc, mode))
+
+        # Any range of a seeded corpus can be regenerated on its own
+        self.assertEqual(list(poly_generate_corpus(["small"], 2, seed=b"corpus", start=2)), corpus[6:8])
+
+        with io.StringIO() as jsonl_file:
+            self.assertEqual(ntc_write_jsonl(corpus, jsonl_file), len(corpus))
+            jsonl_file.seek(0)
+            self.assertEqual(list(ntc_read_jsonl(jsonl_file)), corpus)
+
+        with self.assertRaises(ValueError):
+            poly_generate_testcase("huge")
+        # Keys in form f = 1 + pF can fail to decrypt with tiny params
+        with self.assertRaises(ValueError):
+            poly_generate_testcase("tiny", key_form=KEY_FORM_FAST_FP)
+
+    def test_keygen_batch(self):
+        N, p, q, d = 97, 3, 512, 5
+        M = [ 0 ] * (N + 1); M[0], M[N] = (-1, 1)
+        randbytes = shake_drbg(b"test_keygen_batch")
+
+        for fast_fp in [False, True]:
+            keys = ntru_keygen_batch(N, p, q, d, 10, randbytes=randbytes, fast_fp=fast_fp)
+            self.assertEqual(len(keys), 10)
+            for h, f in keys:
+                m = ntru_random_message(N, p, randbytes)
+                self.assertEqual(ntru_decrypt(N, p, q, ntru_encrypt(N, q, d, m, h, randbytes), f), m)
+
+        # Non-invertible polynomials (divisible by X - 1) fall back to smaller batches
+        polys = [ ntru_keygen(N, p, q, d, randbytes=randbytes)[1] for _ in range(5) ]
+        polys[1:1] = [ [ 1, -1 ] ]
+        polys.append([ 0, 1, 0, -1 ])
+        inverses = poly_inv_batch(polys, lambda a: poly_inv_modprime(a, M, p), lambda a, b: poly_circ_conv_mod(a, b, N, p))
+        self.assertEqual([ a_inv is None for a_inv in inverses ], [ False, True ] + [ False ] * 4 + [ True ])
+        for a, a_inv in zip(polys, inverses):
+            if a_inv is not None:
+                self.assertEqual(a_inv, poly_inv_modprime(a, M, p))
+
+        self.assertEqual(poly_inv_batch([], None, None), [])